@@ -0,0 +1,16 @@
+"""SNP 위치 기반 유전자 / Function 정보 추출 라이브러리
+
+    from snp_annotator import annotate
+
+    for result in annotate(['1: 110900379'], source='ncbi'):
+        print(result['snp'], result['rows'])
+"""
+from .assemblies import get_assemblies
+from .core import SOURCES, annotate, annotate_incremental, rows_from_store
+from .snps import load_positions_from_json, parse_snp
+from .store import ResultStore
+
+__all__ = [
+    'SOURCES', 'ResultStore', 'annotate', 'annotate_incremental', 'get_assemblies', 'load_positions_from_json',
+    'parse_snp', 'rows_from_store',
+]
@@ -0,0 +1,58 @@
+"""종 / 어셈블리 이름 -> source별 species 값
+
+config.ASSEMBLIES 기본값에 ASSEMBLY_FILE(assemblies.json)이 있으면 합쳐서 사용함
+
+    {"sheep": {"ensembl": "ovis_aries_rambouillet", "ncbi": "GCF_016772045.1"}}
+"""
+import json
+import logging
+import os
+
+from .config import ASSEMBLIES, ASSEMBLY_FILE
+
+logger = logging.getLogger(__name__)
+
+_assemblies = None  # 처음 조회할 때 ASSEMBLY_FILE과 합쳐 한 번만 불러옴
+
+
+def read_assembly_file(path=ASSEMBLY_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            assemblies = json.load(f)
+    except Exception as e:
+        logger.error(f'어셈블리 설정 파일 로드 실패: {e}')
+        return {}
+    if not isinstance(assemblies, dict):
+        logger.error(f'어셈블리 설정 파일 형식 오류: {path}')
+        return {}
+    return {name: entry for name, entry in assemblies.items() if isinstance(entry, dict)}
+
+
+def get_assemblies():
+    """사용 가능한 어셈블리 (이름 -> {'ensembl', 'ncbi'})"""
+    global _assemblies
+    if _assemblies is None:
+        _assemblies = {name: dict(entry) for name, entry in ASSEMBLIES.items()}
+        for name, entry in read_assembly_file().items():
+            _assemblies.setdefault(name, {}).update(entry)
+    return _assemblies
+
+
+def get_assembly(name):
+    assembly = get_assemblies().get(name)
+    if assembly is None:
+        raise ValueError(f'알 수 없는 어셈블리: {name} (가능한 값: {", ".join(get_assemblies())})')
+    return assembly
+
+
+def species_for(source, name):
+    """어셈블리 이름에 해당하는 source별 species 값 (merged는 "Ensembl species,NCBI accession")"""
+    assembly = get_assembly(name)
+    if source == 'merged':
+        return f'{assembly.get("ensembl", "")},{assembly.get("ncbi", "")}'
+    species = assembly.get(source)
+    if not species:
+        raise ValueError(f'어셈블리 {name}에 {source} 값이 없음')
+    return species
@@ -0,0 +1,225 @@
+"""명령행 진입점"""
+import argparse
+import logging
+import os
+
+from .assemblies import get_assemblies
+from .config import AUTO_SAVE_INTERVAL, MAX_CONSECUTIVE_FAILURES, OUTPUT_FILES
+from .core import (SOURCES, annotate, annotate_incremental, columns_for, has_assemblies, resolve_species, rows_from_store,
+                   species_for_assemblies)
+from .pipeline import ResultWriter
+from .snps import load_positions_from_json
+
+logger = logging.getLogger('snp_annotator')
+
+
+def setup_logging(log_file):
+    """콘솔과 로그 파일에 동시에 기록"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def handle_network_error(consecutive_failures):
+    """네트워크 에러 처리"""
+    if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+        logger.warning(f'\n{"=" * 60}')
+        logger.warning(f'연속 {MAX_CONSECUTIVE_FAILURES}회 네트워크 에러 발생')
+        logger.warning(f'네트워크 연결을 확인하고 Enter 키를 눌러 재개하세요...')
+        logger.warning(f'{"=" * 60}\n')
+        input()  # 사용자 입력 대기
+        return 0  # 실패 카운터 리셋
+    return consecutive_failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='SNP 위치 기반 유전자 / Function 정보 추출')
+    parser.add_argument('--source', choices=SOURCES, default='ncbi', help='데이터 소스 (기본값: ncbi, merged: Ensembl / NCBI 동시 조회 후 병합)')
+    parser.add_argument('--species', help='Ensembl species 이름 또는 NCBI 어셈블리 accession '
+                                            '(merged: "bos_taurus,GCF_000003055.6")')
+    parser.add_argument('--assembly', choices=sorted(get_assemblies()),
+                        help='종 / 어셈블리 이름 (--species 대신 사용, 입력 파일에 어셈블리가 지정된 SNP는 그 값이 우선)')
+    parser.add_argument('--input', default='snps.json', help='SNP 입력 파일 (기본값: snps.json)')
+    parser.add_argument('--output', help='Excel 출력 파일')
+    parser.add_argument('--progress-file', help='진행 상황 파일')
+    parser.add_argument('--log-file', help='로그 파일')
+    parser.add_argument('--incremental', action='store_true',
+                        help='결과 저장소에 없는 SNP만 조회하고 출력 파일은 저장된 결과로 다시 작성')
+    parser.add_argument('--store', help='증분 실행용 결과 저장소 파일')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='2 이상이면 네트워크 요청 / 파싱 / 기록을 겹쳐 실행하는 파이프라인 사용 (요청 스레드 수)')
+    parser.add_argument('--parse-workers', type=int, help='파이프라인의 HTML 파싱 프로세스 수 (기본값: CPU 수)')
+    resume = parser.add_mutually_exclusive_group()
+    resume.add_argument('--resume', dest='resume', action='store_const', const=True,
+                        help='묻지 않고 이전 진행 상황에서 재개')
+    resume.add_argument('--restart', dest='resume', action='store_const', const=False,
+                        help='묻지 않고 처음부터 새로 시작')
+    args = parser.parse_args(argv)
+
+    defaults = OUTPUT_FILES[args.source]
+    args.output = args.output or defaults['excel']
+    args.progress_file = args.progress_file or defaults['progress']
+    args.log_file = args.log_file or defaults['log']
+    args.store = args.store or defaults['store']
+    return args
+
+
+def open_workbook(args):
+    """이전 진행 상황이 있으면 이어서, 없으면 새 워크북으로 시작"""
+    from .excel import load_existing_workbook, load_progress, new_workbook
+
+    previous_progress = load_progress(args.progress_file)
+    if not previous_progress or not os.path.exists(args.output):
+        # 새로 시작
+        return new_workbook(args.columns), 0
+
+    # 이전 작업 이어서 진행
+    try:
+        wb = load_existing_workbook(args.output)
+        start_index = previous_progress['last_processed_index'] + 1
+        logger.info(f'이전 작업을 이어서 진행합니다. 시작 인덱스: {start_index}')
+    except Exception as e:
+        logger.error(f'이전 파일 로드 실패: {e}. 새로 시작합니다.')
+        return new_workbook(args.columns), 0
+
+    # 재개 여부 확인
+    resume = args.resume
+    if resume is None:
+        resume = input(f'\n이전 진행 상황에서 재개하시겠습니까? (y/n): ').lower() == 'y'
+    if not resume:
+        logger.info('처음부터 새로 시작합니다.')
+        return new_workbook(args.columns), 0
+    return wb, start_index
+
+
+def run_incremental(args, snps_value):
+    """저장된 결과를 재사용하고 새로 추가되거나 바뀐 SNP만 조회"""
+    from .excel import new_workbook, write_rows
+    from .store import ResultStore, make_version
+
+    # 어셈블리가 지정된 SNP는 저장소 키에 species가 들어가므로 버전은 기본 species 기준
+    version = make_version(args.source, resolve_species(args.source, args.species, args.assembly))
+    store = ResultStore.load(args.store, version)
+
+    logger.info(f'=== 증분 유전자 데이터 처리 시작 ===')
+    logger.info(f'전체 SNP 개수: {len(snps_value)}, 저장된 결과: {len(store)}')
+
+    consecutive_failures = 0  # 연속 실패 카운터
+    processed = 0
+    try:
+        for result in annotate_incremental(snps_value, store, source=args.source, species=args.species,
+                                           workers=args.workers, parse_workers=args.parse_workers,
+                                           assembly=args.assembly):
+            processed += 1
+            logger.info(f'[신규 {processed}] 처리 완료: {result["snp"]}')
+
+            if result['failed']:
+                consecutive_failures += 1
+                if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                    store.save()
+                    consecutive_failures = handle_network_error(consecutive_failures)
+            else:
+                consecutive_failures = 0  # 성공적으로 처리됨
+
+            # 자동 저장
+            if processed % AUTO_SAVE_INTERVAL == 0:
+                store.save()
+    finally:
+        store.save()
+    logger.info(f'새로 조회한 SNP 개수: {processed}')
+
+    # 저장된 결과로 출력 파일을 입력 순서대로 다시 작성
+    wb = new_workbook(args.columns)
+    write_rows(wb.active, rows_from_store(snps_value, store, args.source), args.columns)
+    wb.save(args.output)
+    wb.close()
+    logger.info(f'Excel 파일 최종 저장 완료: {args.output}')
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args.log_file)
+
+    from .excel import save_progress, write_rows
+
+    snps_value = load_positions_from_json(args.input)
+    if not snps_value:
+        logger.error('snp.json 파일 형식에 오류가 있습니다.')
+        return 1
+
+    try:
+        species_for_assemblies(snps_value, args.source, args.species, args.assembly)
+    except ValueError as e:
+        logger.error(f'snp.json 어셈블리 설정 오류: {e}')
+        return 1
+
+    # 여러 종 / 어셈블리가 섞인 입력이면 Assembly 열을 추가
+    args.columns = columns_for(args.source, has_assemblies(snps_value))
+
+    if args.incremental:
+        return run_incremental(args, snps_value)
+
+    wb, start_index = open_workbook(args)
+    ws = wb.active
+
+    total_count = len(snps_value)
+    logger.info(f'=== 유전자 데이터 처리 시작 ===')
+    logger.info(f'총 처리할 SNP 개수: {total_count}')
+    if start_index > 0:
+        logger.info(f'시작 위치: {start_index} (남은 개수: {total_count - start_index})')
+
+    def write(result):
+        """기록 스레드에서 실행: Excel 행 작성 및 자동 저장"""
+        write_rows(ws, result['rows'], args.columns)
+        current_index = result['index'] + 1
+        if current_index % AUTO_SAVE_INTERVAL == 0:
+            save_progress(result['index'], total_count, wb, args.output, args.progress_file)
+
+    writer = ResultWriter(write)
+    consecutive_failures = 0  # 연속 실패 카운터
+    try:
+        results = annotate(snps_value, source=args.source, species=args.species, start=start_index,
+                           workers=args.workers, parse_workers=args.parse_workers, assembly=args.assembly)
+        for result in results:
+            i = result['index']
+
+            # 진행률 계산
+            current_index = i + 1
+            progress_percent = (current_index / total_count) * 100
+            logger.info(f'[{current_index}/{total_count}] ({progress_percent:.1f}%) 처리 완료: {result["snp"]}')
+
+            writer.put(result)
+
+            if result['failed']:
+                consecutive_failures += 1
+                if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                    # 중간 저장 (기록 스레드가 밀린 결과를 모두 쓴 뒤)
+                    writer.flush()
+                    save_progress(i, total_count, wb, args.output, args.progress_file)
+                    consecutive_failures = handle_network_error(consecutive_failures)
+            else:
+                consecutive_failures = 0  # 성공적으로 처리됨
+    finally:
+        writer.close()
+
+    # 최종 저장
+    logger.info(f'=== 모든 SNP 처리 완료 ===')
+    save_progress(total_count - 1, total_count, wb, args.output, args.progress_file)
+
+    # 최종 Excel 파일 저장
+    wb.save(args.output)
+    logger.info(f'Excel 파일 최종 저장 완료: {args.output}')
+
+    # 진행 상황 파일 삭제 (완료되었으므로)
+    if os.path.exists(args.progress_file):
+        os.remove(args.progress_file)
+        logger.info(f'진행 상황 파일 삭제: {args.progress_file}')
+
+    wb.close()
+    return 0
@@ -0,0 +1,73 @@
+"""공통 설정값"""
+
+# 이름으로 선택할 수 있는 종 / 어셈블리 (Ensembl species, NCBI 어셈블리 accession)
+# ASSEMBLY_FILE 에 같은 형식으로 추가하거나 덮어쓸 수 있음
+ASSEMBLIES = {
+    'cattle': {'ensembl': 'bos_taurus', 'ncbi': 'GCF_000003055.6'},
+    'pig': {'ensembl': 'sus_scrofa', 'ncbi': 'GCF_000003025.6'},
+    'chicken': {'ensembl': 'gallus_gallus', 'ncbi': 'GCF_016699485.2'},
+}
+ASSEMBLY_FILE = 'assemblies.json'
+
+# 기본 대상 종 / 어셈블리
+DEFAULT_ASSEMBLY = 'cattle'
+ENSEMBL_SPECIES = ASSEMBLIES[DEFAULT_ASSEMBLY]['ensembl']
+NCBI_ACCESSION = ASSEMBLIES[DEFAULT_ASSEMBLY]['ncbi']
+
+ENSEMBL_REST_URL = 'https://rest.ensembl.org'
+NCBI_DATASETS_URL = 'https://api.ncbi.nlm.nih.gov/datasets/v2'
+NCBI_GENE_PAGE_URL = 'https://www.ncbi.nlm.nih.gov/gene'
+
+# Ensembl overlap 구간 묶음 조회
+ENSEMBL_MAX_REGION_SIZE = 5_000_000  # overlap/region 요청 한 번의 최대 구간 길이 (Ensembl REST 제한)
+ENSEMBL_REGION_GAP = 500_000  # 이웃 SNP 간격이 이 이하이면 같은 구간으로 묶음
+
+REQUEST_TIMEOUT = 30  # 초
+MAX_RETRIES = 3  # 요청 재시도 횟수
+NCBI_REQUEST_INTERVAL = 0.5  # NCBI 요청 간 대기 시간 (NCBI 정책 준수)
+ENSEMBL_REQUEST_INTERVAL = 1 / 15  # Ensembl REST 요청 간 대기 시간 (초당 15회 제한)
+
+# 소스별 출력 파일
+OUTPUT_FILES = {
+    'ensembl': {
+        'progress': 'progress.json',
+        'excel': 'gene_data_output.xlsx',
+        'log': 'gene_automation.log',
+        'store': 'results_ensembl.jsonl',
+    },
+    'ncbi': {
+        'progress': 'progress_ncbi.json',
+        'excel': 'ncbi_gene_data_output.xlsx',
+        'log': 'gene_automation_ncbi.log',
+        'store': 'results_ncbi.jsonl',
+    },
+    'merged': {
+        'progress': 'progress_merged.json',
+        'excel': 'merged_gene_data_output.xlsx',
+        'log': 'gene_automation_merged.log',
+        'store': 'results_merged.jsonl',
+    },
+}
+
+AUTO_SAVE_INTERVAL = 10  # 10개 처리마다 자동 저장
+MAX_CONSECUTIVE_FAILURES = 3  # 연속 실패 허용 횟수
+
+REPORT_PAGE_SIZE = 1000  # annotation report 페이지당 유전자 수
+FUNCTION_BATCH_SIZE = 100  # gene/id 요청 한 번에 조회할 유전자 수
+GO_LABEL_FILE = 'go_terms.tsv'  # GO term ID -> 이름 저장소
+GO_OBO_URL = 'http://purl.obolibrary.org/obo/go/go-basic.obo'
+
+INDEX_DIR = 'gene_index'  # 이진 유전자 인덱스 파일 (<accession>.gidx) 저장 위치
+
+# 단계별 파이프라인 (--workers 2 이상일 때)
+PIPELINE_WINDOW = 64  # 동시에 처리 중인 최대 SNP 수
+WRITER_QUEUE_SIZE = 256  # 기록 대기 중인 최대 결과 수
+
+# 로컬 어노테이션 서비스
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+
+# 파싱 / 조회 로직이 바뀌어 이전 결과를 재사용하면 안 될 때 올림
+ANNOTATION_VERSION = 2
+
+MERGE_QUEUE_SIZE = 64  # 교차 소스 병합 시 한 소스가 다른 소스보다 앞서 조회할 수 있는 최대 SNP 수
@@ -0,0 +1,157 @@
+"""라이브러리 진입점"""
+from . import ensembl, merge, ncbi, pipeline
+from .assemblies import species_for
+from .results import COLUMNS, make_row
+from .snps import parse_snp
+
+SOURCES = ('ensembl', 'ncbi', 'merged')
+
+ASSEMBLY_COLUMN = ('Assembly', 'assembly')
+
+
+def resolve_species(source, species=None, assembly=None):
+    """source별 종 / 어셈블리 결정 (merged는 "Ensembl species,NCBI accession")
+
+    species가 지정되면 그대로 사용하고, 없으면 어셈블리 이름, 둘 다 없으면 config 기본값
+    """
+    if source not in SOURCES:
+        raise ValueError(f'지원하지 않는 source: {source} (가능한 값: {", ".join(SOURCES)})')
+    if not species and assembly:
+        return species_for(source, assembly)
+    if source == 'ensembl':
+        return species or ensembl.ENSEMBL_SPECIES
+    elif source == 'ncbi':
+        return species or ncbi.NCBI_ACCESSION
+    return ','.join(merge.parse_species(species))
+
+
+def annotate(snps, source='ncbi', species=None, start=0, workers=1, parse_workers=None, assembly=None):
+    """SNP 목록을 어노테이션하여 SNP별 결과 딕셔너리를 순서대로 생성
+
+    snps: "11: 55704515" 형식 문자열 또는 {'chrom', 'pos'[, 'assembly']} 딕셔너리 목록
+    source: 'ensembl', 'ncbi' 또는 'merged' (두 소스를 동시에 조회하여 병합)
+    species: Ensembl species 이름 또는 NCBI 어셈블리 accession (기본값은 config 참고),
+             merged는 "bos_taurus,GCF_000003055.6" 형식
+    start: 이 인덱스부터 처리 (이전 진행 상황에서 재개할 때 사용)
+    workers: 2 이상이면 단계별 파이프라인 사용 (네트워크 요청 스레드 수, merged는 해당 없음)
+    parse_workers: 파이프라인의 HTML 파싱 프로세스 수 (기본값: CPU 수)
+    assembly: 어셈블리 이름 (예: 'pig', config.ASSEMBLIES 참고), species가 없을 때 사용
+
+    SNP마다 'assembly'가 있으면 그 어셈블리로 조회하고 결과와 행에 'assembly'를 넣음.
+    입력 전체에서 어셈블리별로 SNP를 모아 한 번씩 처리하며 (어셈블리별 유전자
+    인덱스는 프로세스당 처음 필요할 때 한 번만 불러옴), 결과는 입력 순서대로 생성함
+    """
+    snps = [parse_snp(snp) for snp in snps]
+    species_by_assembly = species_for_assemblies(snps, source, species, assembly)
+    return _annotate_assemblies(snps, source, species_by_assembly, start, workers, parse_workers)
+
+
+def species_for_assemblies(snps, source, species=None, assembly=None):
+    """입력에 나오는 어셈블리 이름 -> species (None은 어셈블리가 없는 SNP의 기본값)
+
+    알 수 없는 어셈블리가 있으면 조회를 시작하기 전에 ValueError
+    """
+    species_by_assembly = {None: resolve_species(source, species, assembly)}
+    for snp in snps:
+        if snp.get('assembly') and snp['assembly'] not in species_by_assembly:
+            species_by_assembly[snp['assembly']] = resolve_species(source, assembly=snp['assembly'])
+    return species_by_assembly
+
+
+def _annotate_assemblies(snps, source, species_by_assembly, start, workers, parse_workers):
+    """species별로 모은 SNP를 한 번씩 어노테이션하고 입력 순서대로 생성
+
+    species마다 하나의 생성기(파이프라인 / 구간 묶음 조회)를 두고, 입력 순서대로
+    해당 SNP가 속한 생성기에서 다음 결과를 꺼냄. 각 생성기는 자기 SNP를 순서대로
+    생성하므로 결과를 따로 보관하지 않음
+    """
+    # 어셈블리 이름이 달라도 species가 같으면 (예: 기본값과 'cattle') 한 번에 처리
+    species_of = [species_by_assembly[snp.get('assembly')] for snp in snps]
+    groups = {}
+    for i in range(start, len(snps)):
+        groups.setdefault(species_of[i], []).append(snps[i])
+
+    results = {
+        species: iter(_annotate(group, source, species, workers, parse_workers))
+        for species, group in groups.items()
+    }
+    try:
+        for i in range(start, len(snps)):
+            result = next(results[species_of[i]])
+            result['index'] = i
+            snp_assembly = snps[i].get('assembly')
+            if snp_assembly:
+                result['assembly'] = snp_assembly
+                for row in result['rows']:
+                    row['assembly'] = snp_assembly
+            yield result
+    finally:
+        # 중간에 멈추면 각 생성기의 스레드 / 프로세스 풀도 정리
+        for species_results in results.values():
+            close = getattr(species_results, 'close', None)
+            if close is not None:
+                close()
+
+
+def _annotate(snps, source, species, workers, parse_workers):
+    if workers > 1 and source != 'merged':
+        return pipeline.annotate(snps, source, species, workers, parse_workers)
+    elif source == 'ensembl':
+        return ensembl.annotate(snps, species)
+    elif source == 'merged':
+        return merge.annotate(snps, species)
+    return ncbi.annotate(snps, species)
+
+
+def annotate_incremental(snps, store, source='ncbi', species=None, workers=1, parse_workers=None,
+                         assembly=None):
+    """store에 결과가 없는 SNP만 어노테이션하고 성공한 결과를 store에 추가
+
+    입력 순서가 바뀌거나 중복이 있어도 chrom:pos (어셈블리가 지정된 SNP는
+    species/chrom:pos) 기준으로 한 번만 조회하며, 새로 조회한 SNP의 결과만
+    생성함 (전체 출력은 rows_from_store로 다시 구성)
+    """
+    pending = {}
+    for snp in snps:
+        snp = parse_snp(snp)
+        snp_key = store_key(snp, source)
+        if snp_key not in store:
+            pending.setdefault(snp_key, snp)
+
+    pending_keys = list(pending)
+    results = annotate(list(pending.values()), source, species, workers=workers, parse_workers=parse_workers,
+                       assembly=assembly)
+    for result in results:
+        if not result['failed']:
+            store.put(pending_keys[result['index']], result['rows'])
+        yield result
+
+
+def store_key(snp, source='ncbi'):
+    """결과 저장소 키: chrom:pos, 어셈블리가 지정된 SNP는 앞에 해당 species를 붙임"""
+    snp_value = f'{snp["chrom"]}:{snp["pos"]}'
+    if snp.get('assembly'):
+        return f'{resolve_species(source, assembly=snp["assembly"])}/{snp_value}'
+    return snp_value
+
+
+def has_assemblies(snps):
+    return any(isinstance(snp, dict) and snp.get('assembly') for snp in snps)
+
+
+def columns_for(source, with_assembly=False):
+    """source별 Excel 출력 열 (헤더, 결과 키), with_assembly이면 맨 앞에 Assembly 열"""
+    columns = merge.MERGED_COLUMNS if source == 'merged' else COLUMNS
+    return [ASSEMBLY_COLUMN] + columns if with_assembly else columns
+
+
+def rows_from_store(snps, store, source='ncbi'):
+    """입력 순서대로 저장된 결과 행을 생성 (결과가 없는 SNP는 빈 행)"""
+    empty_row = merge.make_merged_row if source == 'merged' else make_row
+    for snp in snps:
+        snp = parse_snp(snp)
+        rows = store.get(store_key(snp, source)) or [empty_row(f'{snp["chrom"]}:{snp["pos"]}')]
+        for row in rows:
+            if snp.get('assembly'):
+                row = dict(row, assembly=snp['assembly'])
+            yield row
@@ -0,0 +1,287 @@
+"""Ensembl REST API + NCBI Gene 페이지 기반 어노테이션"""
+import logging
+
+from .config import (ENSEMBL_MAX_REGION_SIZE, ENSEMBL_REGION_GAP, ENSEMBL_REQUEST_INTERVAL, ENSEMBL_REST_URL,
+                     ENSEMBL_SPECIES, NCBI_GENE_PAGE_URL, NCBI_REQUEST_INTERVAL, REQUEST_TIMEOUT)
+from . import go_terms
+from .net import get_session, get_with_retry, throttle
+from .results import make_result, make_row
+from .snps import parse_snp
+
+logger = logging.getLogger(__name__)
+
+ENSEMBL_HEADERS = {'Content-Type': 'application/json'}
+
+# NCBI Gene 페이지 Function 캐시 (같은 유전자 안의 SNP가 페이지를 다시 요청하지 않도록)
+_page_function_cache = {}
+
+
+def get_genes_in_region(species, chrom, start, end):
+    """구간과 겹치는 모든 유전자 목록, 요청 실패 시 None
+
+    한 번의 요청이 구간 안의 모든 SNP를 담당하므로 일시적인 오류는 재시도함
+    """
+    url = f'{ENSEMBL_REST_URL}/overlap/region/{species}/{chrom}:{start}-{end}'
+    params = {'feature': 'gene'}
+
+    # Rate limiting: Ensembl REST 요청 제한(초당 15회) 준수, 스레드 간 공유
+    throttle('ensembl', ENSEMBL_REQUEST_INTERVAL)
+
+    resp = get_with_retry(url, headers=ENSEMBL_HEADERS, params=params, label='Ensembl')
+    if resp is None:
+        logger.error(f'  └─ Ensembl API 요청 실패 ({chrom}:{start}-{end})')
+        return None
+    try:
+        return resp.json() or []
+    except Exception as e:
+        logger.error(f'  └─ Ensembl API 응답 처리 중 예외 발생: {e}')
+        return None
+
+
+def get_genes_at_pos(species, chrom, pos):
+    """위치와 겹치는 모든 유전자 목록, 요청 실패 시 None"""
+    return get_genes_in_region(species, chrom, pos, pos)
+
+
+def get_gene_at_pos(species, chrom, pos):
+    genes = get_genes_at_pos(species, chrom, pos)
+    return genes[0] if genes else None
+
+
+def genes_covering(genes, pos):
+    """구간 조회 결과 중 위치를 포함하는 유전자"""
+    return [gene for gene in genes if gene.get('start', 0) <= pos <= gene.get('end', 0)]
+
+
+def coalesce_regions(snps, max_gap=ENSEMBL_REGION_GAP, max_size=ENSEMBL_MAX_REGION_SIZE):
+    """정렬된 SNP 중 서로 가까운 위치를 하나의 overlap 조회 구간으로 묶음
+
+    이웃 SNP 간격이 max_gap 이하이고 구간 전체 길이가 max_size(Ensembl 구간
+    크기 제한) 이하인 동안 같은 구간에 넣음. 반환값의 members는 snps의 인덱스
+    """
+    order = sorted(range(len(snps)), key=lambda i: (snps[i]['chrom'], snps[i]['pos']))
+    regions = []
+    for i in order:
+        chrom, pos = snps[i]['chrom'], snps[i]['pos']
+        last = regions[-1] if regions else None
+        if (last is not None and last['chrom'] == chrom
+                and pos - last['end'] <= max_gap and pos - last['start'] + 1 <= max_size):
+            last['end'] = pos
+            last['members'].append(i)
+        else:
+            regions.append({'chrom': chrom, 'start': pos, 'end': pos, 'members': [i]})
+    return regions
+
+
+def get_go_terms(gene_id):
+    """유전자의 GO term ID 목록 (라이브러리용, 어노테이션 실행에서는 호출하지 않음)"""
+    url = f'{ENSEMBL_REST_URL}/xrefs/id/{gene_id}'
+    try:
+        resp = get_session().get(url, headers=ENSEMBL_HEADERS, timeout=REQUEST_TIMEOUT)
+        return [ref['primary_id'] for ref in resp.json() if ref['dbname'] == 'GO']
+    except Exception as e:
+        logger.error(f'  └─ GO terms 요청 실패: {e}')
+        return []
+
+
+def get_go_description(go_id):
+    """GO term 이름: 저장소에 있으면 바로 반환하고, 없을 때만 Ensembl에 요청"""
+    label = go_terms.get_label(go_id)
+    if label is not None:
+        return label
+
+    url = f'{ENSEMBL_REST_URL}/ontology/id/{go_id}'
+    try:
+        resp = get_session().get(url, headers=ENSEMBL_HEADERS, timeout=REQUEST_TIMEOUT)
+        if resp.status_code != 200:
+            return go_id
+        js = resp.json()
+        # 1. label(이름)이 있으면 우선 반환
+        # 2. label이 없으면 description(내용) 반환
+        # 3. 둘 다 없으면 GO term ID 반환
+        label = js.get('label', '') or js.get('description', '')
+        if not label:
+            return go_id
+        go_terms.remember_label(go_id, label)
+        return label
+    except Exception as e:
+        logger.error(f'  └─ GO description 요청 실패: {e}')
+        return go_id
+
+
+def get_ncbi_gene_id(gene):
+    """Ensembl gene description의 [Source:...;Acc:527492] 에서 NCBI GeneID 추출"""
+    description = gene.get('description') or ''
+    if 'Acc:' not in description:
+        return None
+    return description.split('Acc:')[1].replace(']', '').strip()
+
+
+def parse_ncbi_gene_page(html):
+    """NCBI Gene 페이지의 Gene Ontology(Molecular function) 테이블 파싱"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # 테이블 내 각 'Function' (혹은 'Molecular function') 행의 텍스트를 추출
+    functions = []
+    for tr in soup.find_all('tr'):
+        # Function 또는 Molecular function 필드에 해당하는 행 판별
+        text = tr.text.strip()
+        lowered = text.lower()
+        if lowered.startswith('enables') or 'binding' in lowered or 'structural molecule activity' in lowered:
+            # 각 셀(열) 분리 (Function label만 추출)
+            tds = tr.find_all('td')
+            if tds:
+                # 첫 번째 셀 혹은 전체 텍스트로 Function 설명 추출
+                functions.append(tds[0].text.strip())
+            else:
+                # td가 없으면 전체 텍스트(행)를 넣음
+                functions.append(text)
+    return functions
+
+
+def get_ncbi_page_functions(ncbi_gene_id):
+    """NCBI Gene 페이지에서 Function 목록 수집, 요청 실패 시 None"""
+    if ncbi_gene_id in _page_function_cache:
+        return _page_function_cache[ncbi_gene_id]
+    functions = fetch_ncbi_page_functions(ncbi_gene_id)
+    if functions is not None:
+        _page_function_cache[ncbi_gene_id] = functions
+    return functions
+
+
+def fetch_ncbi_page_functions(ncbi_gene_id):
+    html = fetch_ncbi_page(ncbi_gene_id)
+    if html is None:
+        return None
+    return parse_ncbi_gene_page(html)
+
+
+def fetch_ncbi_page(ncbi_gene_id):
+    """NCBI Gene 페이지 HTML, 요청 실패 시 None"""
+    url = f'{NCBI_GENE_PAGE_URL}/{ncbi_gene_id}'
+    headers = {'User-Agent': 'Mozilla/5.0'}
+
+    # Rate limiting: www.ncbi.nlm.nih.gov 요청 간 0.5초 간격 유지 (NCBI 정책 준수, 스레드 간 공유)
+    throttle('ncbi-gene-page', NCBI_REQUEST_INTERVAL)
+
+    resp = get_with_retry(url, headers=headers, label='NCBI')
+    if resp is None:
+        return None
+    return resp.text
+
+
+def remember_page_functions(ncbi_gene_id, functions):
+    _page_function_cache[ncbi_gene_id] = functions
+
+
+def get_cached_page_functions(ncbi_gene_id):
+    """캐시된 NCBI Gene 페이지 Function 목록, 없으면 None"""
+    return _page_function_cache.get(ncbi_gene_id)
+
+
+def annotate_snp(chrom, pos, species=ENSEMBL_SPECIES):
+    """SNP 하나를 어노테이션하여 결과 행 목록과 실패 여부를 반환"""
+    genes = get_genes_at_pos(species, chrom, pos)
+    if genes is None:
+        return [make_row(f'{chrom}:{pos}')], True
+    return annotate_genes(f'{chrom}:{pos}', genes)
+
+
+def annotate_genes(snp_value, genes, get_functions=get_ncbi_page_functions):
+    """위치와 겹치는 유전자마다 결과 행을 만들고 실패 여부를 함께 반환
+
+    get_functions: NCBI GeneID -> Function 목록 (실패 시 None)
+    """
+    # 1. 유전자 정보
+    if not genes:
+        logger.warning(f'  └─ 해당 위치에 유전자 정보 없음')
+        return [make_row(snp_value)], False
+
+    rows = []
+    failed = False
+    for gene in genes:
+        row, gene_failed = annotate_gene(snp_value, gene, get_functions)
+        rows.append(row)
+        failed = failed or gene_failed
+    return rows, failed
+
+
+def annotate_gene(snp_value, gene, get_functions=get_ncbi_page_functions):
+    gene_id = gene['id']
+    gene_symbol = gene.get('external_name', '-')
+    logger.info(f'  └─ Gene ID: {gene_id}, Gene Symbol: {gene_symbol}')
+
+    # 2. NCBI GeneID(Entrez) 추출 (예: 소, CTNNA2: 527492)
+    if not gene.get('description'):
+        logger.warning(f'  └─ Gene description 없음')
+        return make_row(snp_value, gene_id, gene_symbol), False
+
+    ncbi_gene_id = get_ncbi_gene_id(gene)
+    try:
+        functions = get_functions(ncbi_gene_id) if ncbi_gene_id else []
+    except Exception as e:
+        logger.error(f'  └─ NCBI 파싱 중 예외 발생: {e}')
+        functions = None
+
+    if functions is None:
+        return make_row(snp_value, gene_id, gene_symbol, ncbi_gene_id=ncbi_gene_id), True
+
+    if functions:
+        logger.info(f'  └─ Function 정보 {len(functions)}개 수집 완료')
+    else:
+        logger.warning(f'  └─ Function 정보 없음')
+    # ncbi_gene_id는 교차 소스 병합 시 NCBI 결과와 연결하는 키
+    return make_row(snp_value, gene_id, gene_symbol, ', '.join(functions), ncbi_gene_id=ncbi_gene_id), False
+
+
+def iter_snp_genes(snps, species=ENSEMBL_SPECIES):
+    """SNP 순서대로 (인덱스, SNP, 위치와 겹치는 유전자 목록 또는 요청 실패 시 None) 생성
+
+    가까운 SNP끼리 묶은 구간마다 overlap 요청을 한 번만 보내고, 돌려받은
+    유전자를 각 SNP 위치에 다시 배정함
+    """
+    def region_genes(region):
+        return get_genes_in_region(species, region['chrom'], region['start'], region['end'])
+
+    for i, snp, genes in iter_snp_regions(snps, region_genes):
+        yield i, snp, (genes_covering(genes, snp['pos']) if genes is not None else None)
+
+
+def iter_snp_regions(snps, get_region):
+    """SNP 순서대로 (인덱스, SNP, 그 SNP가 속한 구간의 get_region(region) 결과) 생성
+
+    get_region은 구간마다 한 번만 호출하며 (파이프라인에서는 Future를 반환),
+    결과는 그 구간의 마지막 SNP를 처리할 때까지만 보관함
+    """
+    snps = [parse_snp(snp) for snp in snps]
+    regions = coalesce_regions(snps)
+    region_of = {}
+    for region_idx, region in enumerate(regions):
+        for i in region['members']:
+            region_of[i] = region_idx
+    remaining = [len(region['members']) for region in regions]
+    region_results = {}
+
+    for i, snp in enumerate(snps):
+        region_idx = region_of[i]
+        if region_idx not in region_results:
+            region_results[region_idx] = get_region(regions[region_idx])
+        region_result = region_results[region_idx]
+        remaining[region_idx] -= 1
+        if remaining[region_idx] == 0:
+            del region_results[region_idx]
+
+        yield i, snp, region_result
+
+
+def annotate(snps, species=ENSEMBL_SPECIES):
+    """SNP 목록을 순서대로 어노테이션하여 SNP별 결과를 생성"""
+    for i, snp, genes in iter_snp_genes(snps, species):
+        snp_value = f'{snp["chrom"]}:{snp["pos"]}'
+        if genes is None:
+            rows, failed = [make_row(snp_value)], True
+        else:
+            rows, failed = annotate_genes(snp_value, genes)
+        yield make_result(i, snp['chrom'], snp['pos'], rows, failed)
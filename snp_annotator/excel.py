@@ -0,0 +1,71 @@
+"""Excel 출력 및 진행 상황 저장"""
+import json
+import logging
+import os
+from datetime import datetime
+
+from .results import COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+def new_workbook(columns=COLUMNS):
+    """헤더가 작성된 새 워크북"""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Gene Data'
+    # 헤더 작성
+    ws.append([header for header, _ in columns])
+    return wb
+
+
+def load_existing_workbook(excel_file):
+    from openpyxl import load_workbook
+
+    return load_workbook(excel_file)
+
+
+def write_rows(ws, rows, columns=COLUMNS):
+    """결과 행을 워크시트 끝에 추가 (행에 없는 열은 빈 값, 예: 어셈블리가 지정되지 않은 SNP의 Assembly)"""
+    for row in rows:
+        ws.append([row.get(key, '') for _, key in columns])
+
+
+def save_progress(current_index, total_count, wb, excel_file, progress_file):
+    """현재 진행 상황을 저장"""
+    try:
+        # Excel 파일 저장
+        wb.save(excel_file)
+        logger.info(f'중간 저장 완료: {excel_file}')
+
+        # 진행 상황 저장
+        progress_data = {
+            'last_processed_index': current_index,
+            'total_count': total_count,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with open(progress_file, 'w') as f:
+            json.dump(progress_data, f, indent=2)
+        logger.info(f'진행 상황 저장: {current_index}/{total_count}')
+        return True
+    except Exception as e:
+        logger.error(f'저장 실패: {e}')
+        return False
+
+
+def load_progress(progress_file):
+    """이전 진행 상황을 불러옴"""
+    if not os.path.exists(progress_file):
+        return None
+
+    try:
+        with open(progress_file, 'r') as f:
+            progress = json.load(f)
+        logger.info(
+            f'이전 진행 상황 발견: {progress["last_processed_index"]}/{progress["total_count"]} ({progress["timestamp"]})')
+        return progress
+    except Exception as e:
+        logger.error(f'진행 상황 로드 실패: {e}')
+        return None
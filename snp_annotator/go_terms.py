@@ -0,0 +1,146 @@
+"""GO term ID -> 이름(label) 저장소
+
+GO term은 수만 개뿐이고 유전자마다 반복되므로, OBO 파일로 한 번에 불러와
+go_terms.tsv 에 저장해 두고 이후에는 메모리 딕셔너리에서 바로 조회함
+
+    python -m snp_annotator.go_terms --obo go-basic.obo    # 로컬 OBO 파일에서 생성
+    python -m snp_annotator.go_terms --download            # go-basic.obo를 한 번 내려받아 생성
+
+저장소에 없는 term은 Ensembl ontology API로 조회한 뒤 파일 끝에 추가함.
+기본 어노테이션 실행은 GO term 이름을 출력하지 않으므로 ensembl.get_go_description을
+직접 호출하는 경우에만 사용됨
+"""
+import argparse
+import logging
+import os
+import tempfile
+
+from .config import GO_LABEL_FILE, GO_OBO_URL
+
+logger = logging.getLogger(__name__)
+
+_labels = None  # 처음 조회할 때 GO_LABEL_FILE에서 불러옴
+
+
+def parse_obo(lines):
+    """OBO 형식의 [Term] 항목에서 {GO ID: name} 추출 (alt_id도 같은 이름으로 등록)"""
+    labels = {}
+    ids, name, in_term = [], None, False
+
+    def flush():
+        if in_term and name:
+            for term_id in ids:
+                labels.setdefault(term_id, name)
+
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            flush()
+            ids, name, in_term = [], None, line == '[Term]'
+        elif in_term and line.startswith('id: '):
+            ids.insert(0, line[4:].strip())
+        elif in_term and line.startswith('alt_id: '):
+            ids.append(line[8:].strip())
+        elif in_term and line.startswith('name: '):
+            name = line[6:].strip()
+    flush()
+    return labels
+
+
+def load_obo_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_obo(f)
+
+
+def download_obo(url=GO_OBO_URL):
+    """GO 전체 OBO 파일을 한 번 내려받아 파싱"""
+    from .net import get_with_retry
+
+    logger.info(f'GO OBO 파일 다운로드 중: {url}')
+    resp = get_with_retry(url, label='GO')
+    if resp is None:
+        return None
+    resp.encoding = 'utf-8'
+    return parse_obo(resp.text.splitlines())
+
+
+def _clean(label):
+    return ' '.join(label.split())
+
+
+def read_label_file(path=GO_LABEL_FILE):
+    labels = {}
+    if not os.path.exists(path):
+        return labels
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            go_id, sep, label = line.rstrip('\n').partition('\t')
+            if sep:
+                labels[go_id] = label
+    return labels
+
+
+def write_label_file(labels, path=GO_LABEL_FILE):
+    """저장소 파일을 새로 작성 (동시에 실행되어도 각자 다른 임시 파일에 쓴 뒤 교체)"""
+    label_dir = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=label_dir, prefix=f'{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for go_id, label in sorted(labels.items()):
+                f.write(f'{go_id}\t{_clean(label)}\n')
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    logger.info(f'GO term 저장소 저장: {len(labels)}개 ({path})')
+
+
+def get_labels():
+    """메모리에 올린 GO term 저장소 (프로세스당 한 번만 파일을 읽음)"""
+    global _labels
+    if _labels is None:
+        _labels = read_label_file()
+    return _labels
+
+
+def preload(labels, path=GO_LABEL_FILE):
+    """대량으로 불러온 이름을 저장소에 합치고 파일로 저장 (메모리와 파일 모두 공백 정리한 이름)"""
+    merged = get_labels()
+    merged.update((go_id, _clean(label)) for go_id, label in labels.items())
+    write_label_file(merged, path)
+    return len(merged)
+
+
+def get_label(go_id):
+    """저장소에 있는 이름, 없으면 None"""
+    return get_labels().get(go_id)
+
+
+def remember_label(go_id, label, path=GO_LABEL_FILE):
+    """API로 새로 조회한 이름을 저장소와 파일 끝에 추가"""
+    label = _clean(label)
+    get_labels()[go_id] = label
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(f'{go_id}\t{label}\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='GO term 이름 저장소 생성')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--obo', help='로컬 OBO 파일 (예: go-basic.obo)')
+    source.add_argument('--download', action='store_true', help=f'{GO_OBO_URL} 에서 내려받아 생성')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    labels = load_obo_file(args.obo) if args.obo else download_obo()
+    if not labels:
+        logger.error('GO term 정보를 불러올 수 없음')
+        return 1
+    preload(labels)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
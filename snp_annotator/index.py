@@ -0,0 +1,120 @@
+"""염색체별 유전자 구간 인덱스"""
+from bisect import bisect_right
+
+
+class GeneIndex:
+    """annotation report의 유전자 구간을 염색체별로 정렬해 두고 위치 조회
+
+    find()는 begin 기준 이분 탐색 후, end의 누적 최댓값이 위치보다 작아지는
+    지점에서 역방향 탐색을 멈추므로 유전자 수와 관계없이 빠르게 동작함
+    """
+
+    def __init__(self):
+        self.genes = []  # [{'gene_id', 'symbol'[, 'ensembl_gene_ids']}]
+        self._intervals = {}  # chrom -> [(begin, end, gene_idx)]
+        self._starts = {}
+        self._max_ends = {}
+
+    def __len__(self):
+        return len(self.genes)
+
+    def add_gene(self, gene_id, symbol, chromosomes, ranges, ensembl_gene_ids=None):
+        gene_idx = len(self.genes)
+        gene = {'gene_id': gene_id, 'symbol': symbol}
+        if ensembl_gene_ids:
+            gene['ensembl_gene_ids'] = list(ensembl_gene_ids)
+        self.genes.append(gene)
+        for chrom in chromosomes:
+            intervals = self._intervals.setdefault(chrom, [])
+            for begin, end in ranges:
+                intervals.append((begin, end, gene_idx))
+
+    def build(self):
+        """구간 정렬 및 탐색용 배열 생성 (add_gene 이후 한 번 호출)"""
+        for chrom, intervals in self._intervals.items():
+            intervals.sort()
+            self._starts[chrom] = [begin for begin, _, _ in intervals]
+            max_ends = []
+            current = 0
+            for _, end, _ in intervals:
+                current = max(current, end)
+                max_ends.append(current)
+            self._max_ends[chrom] = max_ends
+        return self
+
+    def set_ensembl_ids(self, get_ensembl_ids):
+        """gene_id -> Ensembl gene ID 목록 으로 유전자별 교차 소스 병합 키를 채움"""
+        for gene in self.genes:
+            ensembl_gene_ids = get_ensembl_ids(gene['gene_id'])
+            if ensembl_gene_ids:
+                gene['ensembl_gene_ids'] = list(ensembl_gene_ids)
+
+    def chromosomes(self):
+        return list(self._intervals)
+
+    def iter_chromosomes(self):
+        """염색체별 (이름, 정렬된 구간 목록, 누적 최대 end) 생성"""
+        for chrom, intervals in self._intervals.items():
+            yield chrom, intervals, self._max_ends[chrom]
+
+    def find(self, chrom, pos):
+        """위치를 포함하는 유전자 목록 (begin 순)"""
+        intervals = self._intervals.get(chrom)
+        if not intervals:
+            return []
+        max_ends = self._max_ends[chrom]
+        found = []
+        j = bisect_right(self._starts[chrom], pos) - 1
+        while j >= 0 and max_ends[j] >= pos:
+            _, end, gene_idx = intervals[j]
+            if end >= pos and gene_idx not in found:
+                found.append(gene_idx)
+            j -= 1
+        found.reverse()
+        return [self.genes[gene_idx] for gene_idx in found]
+
+
+def build_gene_index(reports):
+    """annotation report 항목 목록으로 GeneIndex 생성"""
+    index = GeneIndex()
+    for report_item in reports:
+        # 안전한 딕셔너리 접근
+        annotation = report_item.get('annotation')
+        if annotation is None:
+            continue
+
+        chromosomes = annotation.get('chromosomes', [])
+        if not isinstance(chromosomes, list):
+            chromosomes = []
+        genomic_regions = annotation.get('genomic_regions', [])
+        if not isinstance(genomic_regions, list):
+            continue
+
+        ranges = list(iter_gene_ranges(genomic_regions))
+        if chromosomes and ranges:
+            ensembl_gene_ids = annotation.get('ensembl_gene_ids')
+            if not isinstance(ensembl_gene_ids, list):
+                ensembl_gene_ids = None
+            index.add_gene(annotation.get('gene_id', ''), annotation.get('symbol', ''), chromosomes, ranges,
+                           ensembl_gene_ids)
+    return index.build()
+
+
+def iter_gene_ranges(genomic_regions):
+    """genomic_regions의 gene_range에서 (begin, end) 정수 쌍을 생성"""
+    for region in genomic_regions:
+        gene_range = region.get('gene_range')
+        if gene_range is None:
+            continue
+
+        ranges = gene_range.get('range', [])
+        if not isinstance(ranges, list):
+            continue
+
+        for rng in ranges:
+            if not isinstance(rng, dict):
+                continue
+            try:
+                yield int(rng.get('begin', '0')), int(rng.get('end', '0'))
+            except (ValueError, TypeError):
+                continue
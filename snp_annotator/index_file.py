@@ -0,0 +1,289 @@
+"""메모리 매핑(mmap) 가능한 이진 유전자 구간 인덱스 파일
+
+annotation report로 한 번 만들어 두면 각 프로세스는 파일을 복사 없이 매핑하여
+바로 조회할 수 있고, 같은 파일을 여는 프로세스끼리 페이지 캐시를 공유함
+
+    python -m snp_annotator.index_file --species GCF_000003055.6 --with-functions
+
+파일 구성 (모든 배열은 네이티브 바이트 순서의 uint32, 8바이트 정렬)
+    헤더          magic, 포맷 버전, 바이트 순서, 개수, 각 구역의 오프셋
+    chroms        염색체별 [이름 오프셋, 이름 길이, 구간 시작, 구간 끝]
+    intervals     염색체 코드, begin, end, 누적 최대 end, 유전자 번호 (각각 별도 배열, 염색체 / begin 순 정렬)
+    genes         유전자별 [gene_id, symbol, function, Ensembl gene ID] 문자열의 (오프셋, 길이)
+    strings       UTF-8 문자열 테이블
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_right
+
+from .config import INDEX_DIR, NCBI_ACCESSION
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SNPGIDX\0'
+FORMAT_VERSION = 2
+NO_VALUE = 0xFFFFFFFF  # 길이 자리에 기록하면 해당 정보(Function / Ensembl gene ID)가 없는 유전자
+FUNCTION_SEPARATOR = '\n'  # Function 목록, Ensembl gene ID 목록 구분자
+GENE_FIELDS = 8  # 유전자 하나의 uint32 개수
+
+# magic, 포맷 버전, 바이트 순서(0: little, 1: big), 염색체 수, 구간 수, 유전자 수, 메타데이터 길이,
+# chroms / intervals(5개) / genes / strings 오프셋, strings 길이
+_HEADER = struct.Struct('<8sIIIIII' + 'Q' * 9)
+_INTERVAL_FIELDS = ('chrom', 'begin', 'end', 'max_end', 'gene')
+
+
+def index_file_path(accession, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, f'{accession}.gidx')
+
+
+def _uint32_array(values=()):
+    arr = array('I', values)
+    if arr.itemsize != 4:
+        raise RuntimeError('uint32 배열을 지원하지 않는 플랫폼')
+    return arr
+
+
+def _aligned(offset):
+    return (offset + 7) & ~7
+
+
+def write_index_file(path, index, functions=None, metadata=None):
+    """GeneIndex와 유전자별 Function 목록(gene_id -> list)을 이진 파일로 저장
+
+    유전자에 'ensembl_gene_ids'가 있으면 교차 소스 병합 키로 함께 저장함
+    """
+    functions = functions or {}
+    strings = bytearray()
+    string_offsets = {}
+
+    def add_string(text):
+        if text not in string_offsets:
+            string_offsets[text] = len(strings)
+            strings.extend(text.encode('utf-8'))
+        return string_offsets[text], len(text.encode('utf-8'))
+
+    def add_list(values):
+        return (0, NO_VALUE) if values is None else add_string(FUNCTION_SEPARATOR.join(values))
+
+    genes = _uint32_array()
+    for gene in index.genes:
+        genes.extend(add_string(gene['gene_id']))
+        genes.extend(add_string(gene['symbol']))
+        genes.extend(add_list(functions.get(gene['gene_id'])))
+        genes.extend(add_list(gene.get('ensembl_gene_ids')))
+
+    chroms = _uint32_array()
+    columns = {field: _uint32_array() for field in _INTERVAL_FIELDS}
+    for code, (chrom, intervals, max_ends) in enumerate(index.iter_chromosomes()):
+        chroms.extend(add_string(chrom))
+        chroms.extend((len(columns['chrom']), len(columns['chrom']) + len(intervals)))
+        for (begin, end, gene_idx), max_end in zip(intervals, max_ends):
+            columns['chrom'].append(code)
+            columns['begin'].append(begin)
+            columns['end'].append(end)
+            columns['max_end'].append(max_end)
+            columns['gene'].append(gene_idx)
+
+    meta_bytes = json.dumps(metadata or {}).encode('utf-8')
+    blocks = [meta_bytes, chroms.tobytes()]
+    blocks += [columns[field].tobytes() for field in _INTERVAL_FIELDS]
+    blocks += [genes.tobytes(), bytes(strings)]
+
+    offsets = []
+    offset = _aligned(_HEADER.size)
+    for block in blocks:
+        offsets.append(offset)
+        offset = _aligned(offset + len(block))
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0 if sys.byteorder == 'little' else 1,
+        len(index.chromosomes()), len(columns['chrom']), len(index.genes), len(meta_bytes),
+        *offsets[1:], len(strings),
+    )
+
+    # 여러 프로세스가 동시에 처음 실행되어도 각자 다른 임시 파일에 쓴 뒤 교체
+    index_dir = os.path.dirname(path) or '.'
+    os.makedirs(index_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=index_dir, prefix=f'{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            for block_offset, block in zip(offsets, blocks):
+                f.write(b'\0' * (block_offset - f.tell()))
+                f.write(block)
+        os.chmod(tmp_path, 0o644)  # mkstemp는 0600으로 만들므로 다른 사용자도 읽을 수 있게
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    logger.info(f'유전자 인덱스 파일 저장: {path} ({len(index.genes)}개 유전자, {len(columns["chrom"])}개 구간)')
+
+
+class MappedGeneIndex:
+    """write_index_file로 만든 파일을 mmap으로 열어 GeneIndex와 같은 방식으로 조회"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _open(self):
+        (magic, version, byteorder, n_chroms, n_intervals, n_genes, meta_len,
+         chroms_off, *offsets) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'지원하지 않는 인덱스 파일 형식: {self.path}')
+        if byteorder != (0 if sys.byteorder == 'little' else 1):
+            raise ValueError(f'바이트 순서가 다른 인덱스 파일: {self.path}')
+
+        interval_offsets, genes_off, strings_off, strings_len = offsets[:5], offsets[5], offsets[6], offsets[7]
+        meta_off = _aligned(_HEADER.size)
+
+        # 잘리거나 손상된 파일: 블록이 파일 끝을 넘으면 조회 결과가 모두 비므로 열지 않음
+        blocks = [(meta_off, meta_len), (chroms_off, n_chroms * 16), (genes_off, n_genes * GENE_FIELDS * 4),
+                  (strings_off, strings_len)]
+        blocks.extend((offset, n_intervals * 4) for offset in interval_offsets)
+        for block_offset, block_len in blocks:
+            if block_offset + block_len > len(self._mm):
+                raise ValueError(f'인덱스 파일이 잘렸거나 손상됨: {self.path}')
+
+        view = memoryview(self._mm)
+        self.metadata = json.loads(bytes(view[meta_off:meta_off + meta_len]) or b'{}')
+
+        def uint32_view(offset, count):
+            return view[offset:offset + count * 4].cast('I')
+
+        chroms = uint32_view(chroms_off, n_chroms * 4)
+        self._columns = {
+            field: uint32_view(offset, n_intervals)
+            for field, offset in zip(_INTERVAL_FIELDS, interval_offsets)
+        }
+        self._genes = uint32_view(genes_off, n_genes * GENE_FIELDS)
+        self._strings = view[strings_off:strings_off + strings_len]
+        self._n_genes = n_genes
+
+        # 염색체 수는 적으므로 이름 -> 구간 범위만 딕셔너리로 유지
+        self._chrom_ranges = {}
+        for code in range(n_chroms):
+            name_off, name_len, lo, hi = chroms[code * 4:code * 4 + 4]
+            self._chrom_ranges[self._string(name_off, name_len)] = (lo, hi)
+
+    def __len__(self):
+        return self._n_genes
+
+    def _string(self, offset, length):
+        return bytes(self._strings[offset:offset + length]).decode('utf-8')
+
+    def _list(self, offset, length):
+        text = self._string(offset, length)
+        return text.split(FUNCTION_SEPARATOR) if text else []
+
+    def gene(self, gene_idx):
+        (gene_id_off, gene_id_len, symbol_off, symbol_len, func_off, func_len,
+         ensembl_off, ensembl_len) = self._genes[gene_idx * GENE_FIELDS:(gene_idx + 1) * GENE_FIELDS]
+        gene = {
+            'gene_id': self._string(gene_id_off, gene_id_len),
+            'symbol': self._string(symbol_off, symbol_len),
+        }
+        if func_len != NO_VALUE:
+            gene['functions'] = self._list(func_off, func_len)
+        if ensembl_len != NO_VALUE:
+            gene['ensembl_gene_ids'] = self._list(ensembl_off, ensembl_len)
+        return gene
+
+    @property
+    def genes(self):
+        return [self.gene(gene_idx) for gene_idx in range(self._n_genes)]
+
+    def chromosomes(self):
+        return list(self._chrom_ranges)
+
+    def find(self, chrom, pos):
+        """위치를 포함하는 유전자 목록 (begin 순)"""
+        chrom_range = self._chrom_ranges.get(chrom)
+        if chrom_range is None:
+            return []
+        lo, hi = chrom_range
+        begins, ends = self._columns['begin'], self._columns['end']
+        max_ends, gene_column = self._columns['max_end'], self._columns['gene']
+
+        found = []
+        j = bisect_right(begins, pos, lo, hi) - 1
+        while j >= lo and max_ends[j] >= pos:
+            if ends[j] >= pos and gene_column[j] not in found:
+                found.append(gene_column[j])
+            j -= 1
+        found.reverse()
+        return [self.gene(gene_idx) for gene_idx in found]
+
+    def close(self):
+        self._columns = self._genes = self._strings = None
+        self._mm.close()
+
+
+def open_index_file(path, accession):
+    """인덱스 파일이 있고 같은 어셈블리로 만든 것이면 매핑해서 반환, 아니면 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        index = MappedGeneIndex(path)
+    except Exception as e:
+        logger.warning(f'인덱스 파일을 열 수 없음 ({e}), 다시 생성합니다.')
+        return None
+    if index.metadata.get('accession') != accession:
+        logger.warning(f'다른 어셈블리의 인덱스 파일: {path}, 다시 생성합니다.')
+        index.close()
+        return None
+    logger.info(f'유전자 인덱스 파일 사용: {path} ({len(index)}개 유전자)')
+    return index
+
+
+def main(argv=None):
+    from . import ncbi
+    from .assemblies import get_assemblies, species_for
+    from .index import build_gene_index
+
+    parser = argparse.ArgumentParser(description='이진 유전자 구간 인덱스 파일 생성')
+    species = parser.add_mutually_exclusive_group()
+    species.add_argument('--species', default=NCBI_ACCESSION, help='NCBI 어셈블리 accession')
+    species.add_argument('--assembly', choices=sorted(get_assemblies()), help='종 / 어셈블리 이름')
+    parser.add_argument('--output', help=f'인덱스 파일 (기본값: {INDEX_DIR}/<accession>.gidx)')
+    parser.add_argument('--with-functions', action='store_true',
+                        help='전체 유전자의 Function 정보와 Ensembl gene ID를 조회하여 함께 저장')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.assembly:
+        args.species = species_for('ncbi', args.assembly)
+    reports = ncbi.load_annotation_reports(args.species)
+    if reports is None:
+        logger.error('annotation report를 가져올 수 없음')
+        return 1
+    index = build_gene_index(reports)
+
+    functions = None
+    if args.with_functions:
+        gene_ids = [gene['gene_id'] for gene in index.genes]
+        ncbi.warm_functions(gene_ids)
+        functions = ncbi.cached_functions(gene_ids)
+        # gene/id 응답에 함께 있는 Ensembl gene ID도 저장 (병합 실행의 두 번째 연결 키)
+        index.set_ensembl_ids(ncbi.get_ensembl_ids)
+
+    write_index_file(args.output or index_file_path(args.species), index, functions, {'accession': args.species})
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+"""Ensembl / NCBI 교차 소스 병합
+
+두 소스를 입력 전체에 대해 각자의 스레드에서 동시에 조회하고, 유전자는 다음 키로 연결함
+    - Ensembl gene description의 Acc: (NCBI GeneID) == NCBI gene_id
+    - Ensembl gene ID 가 NCBI gene/id 응답의 ensembl_gene_ids 에 포함
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import ensembl, ncbi
+from .config import ENSEMBL_SPECIES, MERGE_QUEUE_SIZE, NCBI_ACCESSION
+from .results import make_result
+from .snps import parse_snp
+
+logger = logging.getLogger(__name__)
+
+# 병합 결과 Excel 출력 열 순서 (헤더, 결과 키)
+MERGED_COLUMNS = [
+    ('SNP', 'snp'),
+    ('Ensembl GeneID', 'ensembl_gene_id'),
+    ('NCBI GeneID', 'ncbi_gene_id'),
+    ('Gene', 'gene'),
+    ('Function (Ensembl)', 'ensembl_function'),
+    ('Function (NCBI)', 'ncbi_function'),
+]
+
+
+def parse_species(species=None):
+    """"bos_taurus,GCF_000003055.6" 형식을 (Ensembl species, NCBI accession) 으로 분리"""
+    if not species:
+        return ENSEMBL_SPECIES, NCBI_ACCESSION
+    if isinstance(species, (tuple, list)):
+        ensembl_species, accession = species
+    else:
+        ensembl_species, _, accession = species.partition(',')
+    return ensembl_species.strip() or ENSEMBL_SPECIES, accession.strip() or NCBI_ACCESSION
+
+
+def make_merged_row(snp_value, ensembl_row=None, ncbi_row=None):
+    ensembl_row = ensembl_row or {}
+    ncbi_row = ncbi_row or {}
+    symbol = ncbi_row.get('gene') or ensembl_row.get('gene', '')
+    return {
+        'snp': snp_value,
+        'ensembl_gene_id': ensembl_row.get('gene_id', ''),
+        'ncbi_gene_id': ncbi_row.get('gene_id') or ensembl_row.get('ncbi_gene_id') or '',
+        'gene': '' if symbol == '-' else symbol,
+        'ensembl_function': ensembl_row.get('function', ''),
+        'ncbi_function': ncbi_row.get('function', ''),
+    }
+
+
+def merge_rows(snp_value, ensembl_rows, ncbi_rows):
+    """한 SNP에 대한 두 소스의 결과 행을 유전자 ID로 연결
+
+    짝이 없는 유전자도 각자 한 행으로 남기며, 양쪽 모두 유전자가 없으면 빈 행 하나
+    """
+    ensembl_rows = [row for row in ensembl_rows if row.get('gene_id')]
+    unmatched_ncbi = [row for row in ncbi_rows if row.get('gene_id')]
+
+    merged = []
+    for ensembl_row in ensembl_rows:
+        match = None
+        for ncbi_row in unmatched_ncbi:
+            if (ensembl_row.get('ncbi_gene_id') == ncbi_row['gene_id']
+                    or ensembl_row['gene_id'] in ncbi_row.get('ensembl_gene_ids', [])):
+                match = ncbi_row
+                break
+        if match is not None:
+            unmatched_ncbi.remove(match)
+        merged.append(make_merged_row(snp_value, ensembl_row, match))
+
+    merged.extend(make_merged_row(snp_value, ncbi_row=ncbi_row) for ncbi_row in unmatched_ncbi)
+    return merged or [make_merged_row(snp_value)]
+
+
+def _put(results_queue, item, stop):
+    """큐에 자리가 날 때까지 대기, 병합 쪽이 중단되면 False"""
+    while not stop.is_set():
+        try:
+            results_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(results, results_queue, stop):
+    """한 소스의 결과를 순서대로 큐에 넣음 (예외는 병합 쪽에서 다시 발생)"""
+    try:
+        for result in results:
+            if not _put(results_queue, result, stop):
+                return
+    except Exception as e:
+        _put(results_queue, e, stop)
+
+
+def _take(results_queue):
+    item = results_queue.get()
+    if isinstance(item, Exception):
+        raise item
+    return item
+
+
+def annotate(snps, species=None, queue_size=MERGE_QUEUE_SIZE):
+    """Ensembl / NCBI를 입력 전체에 대해 두 스레드에서 동시에 조회하고 병합 결과를 생성
+
+    전체 소요 시간은 두 소스 시간의 합이 아니라 대략 더 느린 쪽의 시간이 되며,
+    Ensembl 구간 묶음 조회도 입력 전체에 적용됨. 한 소스가 앞서 갈 수 있는
+    SNP 수는 queue_size로 제한함
+    """
+    ensembl_species, accession = parse_species(species)
+    snps = [parse_snp(snp) for snp in snps]
+
+    ensembl_queue, ncbi_queue = queue.Queue(maxsize=queue_size), queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='merge') as executor:
+        executor.submit(_produce, ensembl.annotate(snps, ensembl_species), ensembl_queue, stop)
+        executor.submit(_produce, ncbi.annotate(snps, accession), ncbi_queue, stop)
+        try:
+            for i, snp in enumerate(snps):
+                ensembl_result, ncbi_result = _take(ensembl_queue), _take(ncbi_queue)
+                rows = merge_rows(ensembl_result['snp'], ensembl_result['rows'], ncbi_result['rows'])
+                failed = ensembl_result['failed'] or ncbi_result['failed']
+                yield make_result(i, snp['chrom'], snp['pos'], rows, failed)
+        finally:
+            # 중간에 멈추면 대기 중인 두 스레드를 종료
+            stop.set()
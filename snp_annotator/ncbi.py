@@ -0,0 +1,325 @@
+"""NCBI Datasets API 기반 어노테이션"""
+import logging
+import os
+
+from .config import FUNCTION_BATCH_SIZE, NCBI_ACCESSION, NCBI_DATASETS_URL, NCBI_REQUEST_INTERVAL, REPORT_PAGE_SIZE
+from .index import build_gene_index
+from .index_file import index_file_path, open_index_file, write_index_file
+from .net import get_with_retry, throttle
+from .results import make_result, make_row
+from .snps import parse_snp
+
+logger = logging.getLogger(__name__)
+
+# 프로세스 수명 동안 유지되는 캐시 (장시간 실행되는 워커에서 재사용)
+_index_cache = {}
+_function_cache = {}
+_ensembl_id_cache = {}  # NCBI gene_id -> Ensembl gene ID 목록 (gene/id 응답에서 함께 수집)
+
+
+def get_headers():
+    return {
+        'X-Api-Key': os.getenv('API_KEY'),
+    }
+
+
+def get_annotation_report(accession, page_token=None):
+    url = f'{NCBI_DATASETS_URL}/genome/accession/{accession}/annotation_report'
+    params = {'page_size': REPORT_PAGE_SIZE}
+    if page_token:
+        params['page_token'] = page_token
+
+    # Rate limiting: api.ncbi.nlm.nih.gov 요청 간 0.5초 간격 유지 (NCBI 정책 준수, 스레드 간 공유)
+    throttle('ncbi-datasets', NCBI_REQUEST_INTERVAL)
+
+    resp = get_with_retry(url, headers=get_headers(), params=params, label='NCBI')
+    if resp is None:
+        logger.error(f'  └─ Annotation report 요청 실패 (모든 재시도 소진)')
+        return None
+    try:
+        data = resp.json()
+    except Exception as e:
+        logger.error(f'  └─ Annotation report 요청 중 예외 발생: {e}')
+        return None
+    if not data:
+        logger.warning(f'  └─ NCBI API 응답이 비어있음')
+        return None
+    return data
+
+
+def iter_annotation_reports(accession):
+    """annotation report의 모든 페이지를 따라가며 report 항목을 생성
+
+    페이지 요청이 실패하면 None을 생성하고 중단함
+    """
+    page_token = None
+    while True:
+        report = get_annotation_report(accession, page_token)
+        if report is None:
+            yield None
+            return
+
+        reports = report.get('reports')
+        if reports is None or not isinstance(reports, list):
+            logger.warning(f'  └─ reports 필드가 없거나 리스트가 아님')
+            return
+        yield from reports
+
+        page_token = report.get('next_page_token')
+        if not page_token:
+            return
+
+
+def get_function(gene_id):
+    functions = fetch_function(gene_id)
+    return functions if functions is not None else []
+
+
+def fetch_function(gene_id):
+    """gene/id API에서 Function 목록 조회, 요청 실패 시 None"""
+    url = f'{NCBI_DATASETS_URL}/gene/id/{gene_id}'
+
+    # Rate limiting: api.ncbi.nlm.nih.gov 요청 간 0.5초 간격 유지 (NCBI 정책 준수, 스레드 간 공유)
+    throttle('ncbi-datasets', NCBI_REQUEST_INTERVAL)
+
+    resp = get_with_retry(url, headers=get_headers(), label='NCBI')
+    if resp is None:
+        logger.error(f'  └─ Gene Function 요청 실패 (모든 재시도 소진)')
+        return None
+    try:
+        data = resp.json()
+    except Exception as e:
+        logger.error(f'  └─ Gene Function 요청 중 예외 발생: {e}')
+        return None
+    if not data:
+        logger.warning(f'  └─ Gene Function API 응답이 비어있음')
+        return []
+    return parse_gene_functions(data)
+
+
+def fetch_functions(gene_ids):
+    """여러 유전자의 Function 목록을 한 번의 요청으로 조회, 요청 실패 시 None"""
+    gene_ids = list(gene_ids)
+    url = f'{NCBI_DATASETS_URL}/gene/id/{",".join(gene_ids)}'
+
+    # Rate limiting: api.ncbi.nlm.nih.gov 요청 간 0.5초 간격 유지 (NCBI 정책 준수, 스레드 간 공유)
+    throttle('ncbi-datasets', NCBI_REQUEST_INTERVAL)
+
+    resp = get_with_retry(url, headers=get_headers(), params={'page_size': len(gene_ids)}, label='NCBI')
+    if resp is None:
+        logger.error(f'  └─ Gene Function 요청 실패 (모든 재시도 소진)')
+        return None
+    try:
+        data = resp.json()
+    except Exception as e:
+        logger.error(f'  └─ Gene Function 요청 중 예외 발생: {e}')
+        return None
+
+    # 응답에 없는 유전자는 Function 정보 없음으로 처리
+    functions = {gene_id: [] for gene_id in gene_ids}
+    reports = data.get('reports', []) if data else []
+    if isinstance(reports, list):
+        for report_item in reports:
+            gene = report_item.get('gene') if isinstance(report_item, dict) else None
+            if gene is not None and gene.get('gene_id') in functions:
+                functions[gene['gene_id']] = parse_gene_ontology(gene)
+                remember_ensembl_ids(gene)
+    return functions
+
+
+def parse_gene_functions(data):
+    """gene/id 응답에서 molecular_functions의 name 목록 추출"""
+    # reports 배열에서 gene_ontology 추출
+    reports = data.get('reports', [])
+    if not reports or not isinstance(reports, list):
+        return []
+
+    # 첫 번째 report의 gene 정보
+    gene = reports[0].get('gene')
+    if gene is None:
+        return []
+    remember_ensembl_ids(gene)
+    return parse_gene_ontology(gene)
+
+
+def remember_ensembl_ids(gene):
+    """gene 항목의 ensembl_gene_ids를 교차 소스 병합용으로 보관"""
+    ensembl_gene_ids = gene.get('ensembl_gene_ids')
+    if gene.get('gene_id') and isinstance(ensembl_gene_ids, list):
+        _ensembl_id_cache[gene['gene_id']] = [gene_id for gene_id in ensembl_gene_ids if gene_id]
+
+
+def get_ensembl_ids(gene_id):
+    """알려진 Ensembl gene ID 목록 (gene/id 응답을 받은 적이 없으면 빈 목록)"""
+    return _ensembl_id_cache.get(gene_id, [])
+
+
+def parse_gene_ontology(gene):
+    """gene 항목의 gene_ontology에서 molecular_functions의 name 목록 추출"""
+    gene_ontology = gene.get('gene_ontology')
+    if gene_ontology is None:
+        return []
+
+    molecular_functions = gene_ontology.get('molecular_functions', [])
+    if not isinstance(molecular_functions, list):
+        return []
+
+    # name 필드만 추출
+    function_names = []
+    for func in molecular_functions:
+        if isinstance(func, dict):
+            name = func.get('name')
+            if name:
+                function_names.append(name)
+    return function_names
+
+
+def load_annotation_reports(accession):
+    """annotation report 전체 페이지의 항목 목록, 요청 실패 시 None"""
+    reports = []
+    for report_item in iter_annotation_reports(accession):
+        if report_item is None:
+            return None
+        reports.append(report_item)
+    return reports
+
+
+def load_gene_index(accession):
+    """유전자 구간 인덱스를 프로세스당 한 번만 불러옴
+
+    이진 인덱스 파일이 있으면 mmap으로 열고, 없으면 annotation report 전체
+    페이지로 생성한 뒤 다른 프로세스가 재사용할 수 있도록 파일로 저장함
+    """
+    index = _index_cache.get(accession)
+    if index is not None:
+        return index
+
+    path = index_file_path(accession)
+    index = open_index_file(path, accession)
+    if index is None:
+        logger.info(f'유전자 구간 인덱스 생성 중: {accession}')
+        reports = load_annotation_reports(accession)
+        if reports is None:
+            return None
+        index = build_gene_index(reports)
+        logger.info(f'유전자 구간 인덱스 생성 완료: {len(index)}개 유전자')
+        try:
+            write_index_file(path, index, metadata={'accession': accession})
+        except OSError as e:
+            logger.warning(f'유전자 인덱스 파일 저장 실패: {e}')
+
+    _index_cache[accession] = index
+    return index
+
+
+def get_cached_function(gene_id):
+    """유전자별 Function 목록 캐시, 요청 실패 시 None (실패는 캐시하지 않음)"""
+    functions = _function_cache.get(gene_id)
+    if functions is None:
+        functions = fetch_function(gene_id)
+        if functions is None:
+            return None
+        _function_cache[gene_id] = functions
+    return functions
+
+
+def remember_function(gene_id, functions):
+    _function_cache[gene_id] = functions
+
+
+def warm_functions(gene_ids, batch_size=FUNCTION_BATCH_SIZE):
+    """캐시에 없는 유전자의 Function 목록을 묶음 요청으로 채움"""
+    missing = [gene_id for gene_id in dict.fromkeys(gene_ids) if gene_id and gene_id not in _function_cache]
+    for start in range(0, len(missing), batch_size):
+        functions = fetch_functions(missing[start:start + batch_size])
+        if functions is not None:
+            _function_cache.update(functions)
+    return len(missing)
+
+
+def get_cached_functions_only(gene):
+    """네트워크 요청 없이 인덱스 파일 또는 캐시에 있는 Function 목록만 반환"""
+    if 'functions' in gene:
+        return gene['functions']
+    return peek_function(gene['gene_id'])
+
+
+def peek_function(gene_id):
+    """네트워크 요청 없이 캐시된 Function 목록 (없으면 빈 목록)"""
+    return _function_cache.get(gene_id, [])
+
+
+def is_function_cached(gene_id):
+    return gene_id in _function_cache
+
+
+def cached_functions(gene_ids):
+    """캐시에 있는 유전자의 Function 목록 (gene_id -> list)"""
+    return {gene_id: _function_cache[gene_id] for gene_id in gene_ids if gene_id in _function_cache}
+
+
+def cached_function_count():
+    return len(_function_cache)
+
+
+def annotate_snp(chrom, pos, accession=NCBI_ACCESSION):
+    """SNP 하나를 어노테이션하여 결과 행 목록과 실패 여부를 반환"""
+    snp_value = f'{chrom}:{pos}'
+
+    index = load_gene_index(accession)
+
+    # NoneType 에러 방지: 인덱스를 만들지 못한 경우 처리
+    if index is None:
+        logger.error(f'  └─ API 응답 실패 - 데이터를 가져올 수 없음')
+        return [make_row(snp_value)], True
+
+    return annotate_genes(snp_value, index.find(chrom, pos))
+
+
+def annotate_genes(snp_value, result_genes, get_functions=get_cached_function):
+    """위치에 해당하는 유전자마다 결과 행을 만들고 실패 여부를 함께 반환
+
+    get_functions: NCBI gene_id -> Function 목록, 요청 실패 시 None
+                   (인덱스 파일에 저장된 경우에는 호출하지 않음)
+    """
+    if not result_genes:
+        logger.warning(f'  └─ 해당 위치에 유전자 정보 없음')
+        return [make_row(snp_value)], False
+
+    rows = []
+    failed = False
+    for gene in result_genes:
+        # 안전한 딕셔너리 접근
+        gene_id = gene.get('gene_id', '')
+        gene_symbol = gene.get('symbol', '')
+        logger.info(f'  └─ Gene ID: {gene_id}, Symbol: {gene_symbol}')
+
+        # Gene Function 조회 (인덱스 파일에 저장된 경우 그대로 사용)
+        if 'functions' in gene:
+            functions = gene['functions']
+        else:
+            functions = get_functions(gene_id) if gene_id else []
+        if functions is None:
+            # 요청 실패: 증분 저장소에 저장되지 않고 다음 실행에서 다시 조회됨
+            logger.error(f'  └─ Function 정보 조회 실패')
+            failed = True
+            functions = []
+        elif functions:
+            logger.info(f'  └─ Function 정보 {len(functions)}개 수집 완료')
+        else:
+            logger.warning(f'  └─ Function 정보 없음')
+
+        # Function 리스트를 콤마로 연결
+        # ensembl_gene_ids는 교차 소스 병합 시 Ensembl 결과와 연결하는 키 (인덱스 파일에 있으면 그 값 사용)
+        ensembl_gene_ids = gene.get('ensembl_gene_ids') or get_ensembl_ids(gene_id)
+        rows.append(make_row(snp_value, gene_id, gene_symbol, ', '.join(functions),
+                             ensembl_gene_ids=ensembl_gene_ids))
+    return rows, failed
+
+
+def annotate(snps, accession=NCBI_ACCESSION):
+    """SNP 목록을 순서대로 어노테이션하여 SNP별 결과를 생성"""
+    for i, snp in enumerate(snps):
+        snp = parse_snp(snp)
+        rows, failed = annotate_snp(snp['chrom'], snp['pos'], accession)
+        yield make_result(i, snp['chrom'], snp['pos'], rows, failed)
@@ -0,0 +1,66 @@
+"""재시도 로직이 포함된 HTTP 요청 헬퍼"""
+import logging
+import threading
+import time
+
+from .config import MAX_RETRIES, REQUEST_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_throttle_lock = threading.Lock()
+_next_request_at = {}
+
+
+def get_session():
+    """스레드 단위로 재사용하는 requests 세션 (지연 import)"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        import requests
+        session = _local.session = requests.Session()
+    return session
+
+
+def throttle(key, interval):
+    """같은 key의 요청이 스레드와 관계없이 interval초 간격 이상으로 나가도록 대기
+
+    key는 요청 대상 호스트 단위로 사용함 (예: NCBI Datasets API와 NCBI Gene 페이지는
+    서로 다른 서버이므로 병합 실행 시 두 소스가 서로를 기다리지 않음)
+    """
+    with _throttle_lock:
+        now = time.monotonic()
+        request_at = max(now, _next_request_at.get(key, now))
+        _next_request_at[key] = request_at + interval
+    if request_at > now:
+        time.sleep(request_at - now)
+
+
+def get_with_retry(url, headers=None, params=None, label='NCBI', max_retries=MAX_RETRIES):
+    """GET 요청을 재시도하며 200 응답을 반환, 모두 실패하면 None"""
+    import requests
+
+    session = get_session()
+    for attempt in range(max_retries):
+        try:
+            resp = session.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+            if resp.status_code == 200:
+                return resp
+            elif resp.status_code == 429:  # Too Many Requests
+                logger.warning(f'  └─ {label} Rate limit 도달, 5초 대기 후 재시도 ({attempt + 1}/{max_retries})')
+                time.sleep(5)
+            else:
+                logger.warning(f'  └─ {label} 응답 코드: {resp.status_code}, 재시도 ({attempt + 1}/{max_retries})')
+                time.sleep(2)
+        except requests.exceptions.Timeout:
+            logger.warning(f'  └─ {label} 요청 타임아웃, 재시도 ({attempt + 1}/{max_retries})')
+            time.sleep(2)
+        except requests.exceptions.ConnectionError as e:
+            logger.warning(f'  └─ {label} 연결 에러 (네트워크 문제): {e}')
+            time.sleep(2)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f'  └─ {label} 요청 에러: {e}, 재시도 ({attempt + 1}/{max_retries})')
+            time.sleep(2)
+
+    # 모든 재시도 실패
+    logger.error(f'  └─ {label} 요청 실패 (모든 재시도 소진)')
+    return None
@@ -0,0 +1,270 @@
+"""네트워크 조회 / 파싱 / 기록을 겹쳐 실행하는 단계별 파이프라인
+
+    - I/O 스레드 풀: Ensembl overlap 구간 / NCBI Gene 페이지 / gene/id 묶음 요청 (호스트별 요청 간격은 스레드 간 공유)
+    - 프로세스 풀: NCBI Gene 페이지 HTML 파싱 (BeautifulSoup, CPU 작업)
+    - 기록 스레드: ResultWriter가 bounded queue로 결과를 받아 한 스레드에서 순서대로 기록
+
+처리 중인 SNP 수를 window로 제한하고 기록 큐도 크기를 제한하므로, 기록이
+밀리면 조회도 멈추어 메모리 사용량이 일정하게 유지됨. 결과는 입력 순서대로 생성함
+"""
+import logging
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import ensembl, ncbi
+from .config import FUNCTION_BATCH_SIZE, PIPELINE_WINDOW, WRITER_QUEUE_SIZE
+from .results import make_result, make_row
+
+logger = logging.getLogger(__name__)
+
+
+def _chain(first, then):
+    """first 완료 후 then(결과)가 돌려주는 Future의 결과를 전달하는 Future"""
+    chained = Future()
+
+    def on_first_done(future):
+        try:
+            second = then(future.result())
+        except Exception as e:
+            chained.set_exception(e)
+            return
+        second.add_done_callback(on_second_done)
+
+    def on_second_done(future):
+        try:
+            chained.set_result(future.result())
+        except Exception as e:
+            chained.set_exception(e)
+
+    first.add_done_callback(on_first_done)
+    return chained
+
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _result_or_none(future):
+    """Future 결과, 예외가 있으면 로그를 남기고 None (요청 실패와 같게 처리)"""
+    try:
+        return future.result()
+    except Exception as e:
+        logger.error(f'  └─ 파이프라인 작업 실패: {e}')
+        return None
+
+
+class _EnsemblStages:
+    """overlap 구간 조회와 유전자별 NCBI Gene 페이지 요청은 I/O 풀, 페이지 파싱은 프로세스 풀에서 실행"""
+
+    def __init__(self, io_pool, parse_pool):
+        self.io_pool = io_pool
+        self.parse_pool = parse_pool
+        self.in_flight = {}  # 같은 유전자 페이지는 한 번만 요청
+        self.lock = threading.Lock()  # 구간 조회가 끝난 I/O 스레드에서도 페이지 요청을 등록함
+
+    def page_functions(self, ncbi_gene_id):
+        functions = ensembl.get_cached_page_functions(ncbi_gene_id)
+        if functions is not None:
+            return _completed(functions)
+        with self.lock:
+            if ncbi_gene_id not in self.in_flight:
+                fetched = self.io_pool.submit(ensembl.fetch_ncbi_page, ncbi_gene_id)
+                self.in_flight[ncbi_gene_id] = _chain(fetched, self.parse)
+            return self.in_flight[ncbi_gene_id]
+
+    def parse(self, html):
+        if html is None:
+            return _completed(None)
+        return self.parse_pool.submit(ensembl.parse_ncbi_gene_page, html)
+
+    def region_genes(self, species, region):
+        return self.io_pool.submit(ensembl.get_genes_in_region, species, region['chrom'], region['start'],
+                                   region['end'])
+
+    def snp_pages(self, genes, pos):
+        """구간 조회 결과에서 위치와 겹치는 유전자와 유전자별 페이지 Function Future"""
+        if genes is None:
+            return _completed((None, {}))
+        genes = ensembl.genes_covering(genes, pos)
+        futures = {}
+        for gene in genes:
+            ncbi_gene_id = ensembl.get_ncbi_gene_id(gene) if gene.get('description') else None
+            if ncbi_gene_id:
+                futures[ncbi_gene_id] = self.page_functions(ncbi_gene_id)
+        return _completed((genes, futures))
+
+    def submit(self, snps, species):
+        def region_genes(region):
+            return self.region_genes(species, region)
+
+        for i, snp, region_future in ensembl.iter_snp_regions(snps, region_genes):
+            yield i, snp, _chain(region_future, lambda genes, pos=snp['pos']: self.snp_pages(genes, pos))
+
+    def finish(self, i, snp, job):
+        snp_value = f'{snp["chrom"]}:{snp["pos"]}'
+        genes, futures = _result_or_none(job) or (None, {})
+        if genes is None:
+            return make_result(i, snp['chrom'], snp['pos'], [make_row(snp_value)], True)
+
+        functions = {}
+        for ncbi_gene_id, future in futures.items():
+            functions[ncbi_gene_id] = _result_or_none(future)
+            # 캐시에 먼저 넣은 뒤 in_flight에서 빼야 그 사이에 같은 페이지를 다시 요청하지 않음
+            if functions[ncbi_gene_id] is not None:
+                ensembl.remember_page_functions(ncbi_gene_id, functions[ncbi_gene_id])
+            with self.lock:
+                self.in_flight.pop(ncbi_gene_id, None)
+
+        rows, failed = ensembl.annotate_genes(snp_value, genes, functions.get)
+        return make_result(i, snp['chrom'], snp['pos'], rows, failed)
+
+
+class _NcbiStages:
+    """인덱스 조회는 바로 하고, 캐시에 없는 유전자의 gene/id 요청은 묶어서 I/O 풀에서 실행
+
+    window 안의 SNP들이 필요로 하는 유전자를 모아 두었다가, 묶음이 차거나 가장
+    오래된 SNP가 그 결과를 기다려야 할 때 한 번의 gene/id 요청으로 보냄
+    """
+
+    def __init__(self, io_pool, accession, batch_size=FUNCTION_BATCH_SIZE):
+        self.io_pool = io_pool
+        self.accession = accession
+        self.batch_size = batch_size
+        self.in_flight = {}  # gene_id -> Future (요청 중이거나 묶음에서 대기 중)
+        self.batch = {}  # 아직 요청하지 않은 gene_id -> Future
+
+    def gene_functions(self, gene_id):
+        if gene_id not in self.in_flight:
+            self.in_flight[gene_id] = self.batch[gene_id] = Future()
+            if len(self.batch) >= self.batch_size:
+                self.flush()
+        return self.in_flight[gene_id]
+
+    def flush(self):
+        """모아 둔 유전자를 gene/id 묶음 요청 하나로 I/O 풀에 보냄"""
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, {}
+        fetched = self.io_pool.submit(ncbi.fetch_functions, list(batch))
+        fetched.add_done_callback(lambda future: self._resolve(batch, future))
+
+    @staticmethod
+    def _resolve(batch, future):
+        # 묶음 요청이 실패하면 유전자별 결과는 None (SNP를 실패로 표시)
+        functions = _result_or_none(future)
+        for gene_id, gene_future in batch.items():
+            gene_future.set_result(None if functions is None else functions.get(gene_id, []))
+
+    def submit(self, snps, species):
+        from .snps import parse_snp
+
+        index = ncbi.load_gene_index(self.accession)
+        for i, snp in enumerate(snps):
+            snp = parse_snp(snp)
+            genes = index.find(snp['chrom'], snp['pos']) if index is not None else None
+            futures = {}
+            for gene in genes or []:
+                gene_id = gene.get('gene_id')
+                if gene_id and 'functions' not in gene and not ncbi.is_function_cached(gene_id):
+                    futures[gene_id] = self.gene_functions(gene_id)
+            yield i, snp, genes, futures
+
+    def finish(self, i, snp, genes, futures):
+        snp_value = f'{snp["chrom"]}:{snp["pos"]}'
+        if genes is None:
+            logger.error(f'  └─ API 응답 실패 - 데이터를 가져올 수 없음')
+            return make_result(i, snp['chrom'], snp['pos'], [make_row(snp_value)], True)
+
+        # 이 SNP의 유전자가 아직 묶음에 남아 있으면 기다리기 전에 요청을 보냄
+        if any(gene_id in self.batch for gene_id in futures):
+            self.flush()
+
+        fetched = {}
+        for gene_id, future in futures.items():
+            fetched[gene_id] = _result_or_none(future)
+            if fetched[gene_id] is not None:
+                ncbi.remember_function(gene_id, fetched[gene_id])
+            self.in_flight.pop(gene_id, None)
+
+        # 요청에 실패한 유전자는 None -> 결과를 실패로 표시 (증분 저장소에 저장하지 않음)
+        def get_functions(gene_id):
+            return fetched[gene_id] if gene_id in fetched else ncbi.peek_function(gene_id)
+
+        rows, failed = ncbi.annotate_genes(snp_value, genes, get_functions)
+        return make_result(i, snp['chrom'], snp['pos'], rows, failed)
+
+
+def annotate(snps, source, species, io_workers, parse_workers=None, window=PIPELINE_WINDOW):
+    """단계별 파이프라인으로 어노테이션 (source: 'ensembl' 또는 'ncbi'), 결과는 입력 순서대로 생성"""
+    with ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='fetch') as io_pool:
+        if source == 'ensembl':
+            # I/O 스레드가 이미 떠 있으므로 fork 대신 spawn으로 파싱 프로세스 생성
+            mp_context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=parse_workers, mp_context=mp_context) as parse_pool:
+                yield from _run(_EnsemblStages(io_pool, parse_pool), snps, species, window)
+        else:
+            yield from _run(_NcbiStages(io_pool, species), snps, species, window)
+
+
+def _run(stages, snps, species, window):
+    pending = deque()
+    for job in stages.submit(snps, species):
+        pending.append(job)
+        # 처리 중인 SNP가 window개를 넘으면 가장 오래된 SNP가 끝날 때까지 대기 (backpressure)
+        while len(pending) >= window:
+            yield stages.finish(*pending.popleft())
+    while pending:
+        yield stages.finish(*pending.popleft())
+
+
+class ResultWriter:
+    """결과를 bounded queue로 받아 전용 스레드 하나에서 순서대로 write(result) 실행
+
+    큐가 가득 차면 put()이 대기하므로 기록이 느리면 조회 쪽도 함께 늦춰짐
+    """
+
+    _STOP = object()
+
+    def __init__(self, write, maxsize=WRITER_QUEUE_SIZE):
+        self.write = write
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name='writer', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            result = self.queue.get()
+            try:
+                if result is self._STOP:
+                    return
+                if self.error is None:
+                    self.write(result)
+            except Exception as e:
+                logger.error(f'결과 기록 실패: {e}')
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def _check(self):
+        if self.error is not None:
+            raise self.error
+
+    def put(self, result):
+        self._check()
+        self.queue.put(result)
+
+    def flush(self):
+        """지금까지 넣은 결과가 모두 기록될 때까지 대기"""
+        self.queue.join()
+        self._check()
+
+    def close(self):
+        self.queue.put(self._STOP)
+        self.thread.join()
+        self._check()
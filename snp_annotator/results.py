@@ -0,0 +1,31 @@
+"""어노테이션 결과 구조"""
+
+# Excel 출력 열 순서 (헤더, 결과 키)
+COLUMNS = [
+    ('SNP', 'snp'),
+    ('GeneID', 'gene_id'),
+    ('Gene', 'gene'),
+    ('Function', 'function'),
+]
+
+
+def make_row(snp_value, gene_id='', gene_symbol='', function='', **extra):
+    """출력 한 행 (유전자 정보가 없으면 빈 값으로 채움)
+
+    extra는 출력 열에는 없지만 교차 소스 병합 등에 쓰이는 값 (예: ncbi_gene_id)
+    """
+    row = {'snp': snp_value, 'gene_id': gene_id, 'gene': gene_symbol, 'function': function}
+    row.update(extra)
+    return row
+
+
+def make_result(index, chrom, pos, rows, failed=False):
+    """SNP 하나에 대한 어노테이션 결과"""
+    return {
+        'index': index,
+        'snp': f'{chrom}:{pos}',
+        'chrom': chrom,
+        'pos': pos,
+        'rows': rows,
+        'failed': failed,
+    }
@@ -0,0 +1,152 @@
+"""로컬 HTTP/JSON 어노테이션 서비스
+
+유전자 구간 인덱스와 Function 캐시를 시작 시 한 번만 불러와 메모리에 유지하고
+POST /annotate 요청을 처리함. 다른 어셈블리의 인덱스는 처음 요청될 때 한 번만 불러옴
+
+    python -m snp_annotator.service --port 8765 --preload-functions
+
+    POST /annotate  {"snps": ["1: 110900379", {"chrom": "11", "pos": 55704515}]}
+    POST /annotate  {"assembly": "pig", "snps": ["1: 110900379", {"chrom": "1", "pos": 5000, "assembly": "chicken"}]}
+    GET  /health
+"""
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import ncbi
+from .assemblies import get_assemblies, species_for
+from .config import NCBI_ACCESSION, SERVICE_HOST, SERVICE_PORT
+from .results import make_result, make_row
+from .snps import parse_snp
+
+logger = logging.getLogger(__name__)
+
+
+def load_index(accession):
+    index = ncbi.load_gene_index(accession)
+    if index is None:
+        raise RuntimeError(f'유전자 구간 인덱스를 불러올 수 없음: {accession}')
+    return index
+
+
+def annotate_batch(snps, accession=NCBI_ACCESSION, assembly=None):
+    """메모리에 있는 인덱스로 SNP 묶음을 어노테이션
+
+    캐시에 없는 유전자의 Function만 묶음 요청으로 한 번에 조회하므로
+    캐시가 채워진 뒤에는 네트워크 요청 없이 응답함. 요청에 실패해 Function을
+    알 수 없는 유전자가 있으면 그 SNP는 failed로 표시함. assembly가 지정된
+    SNP는 해당 어셈블리의 인덱스로 조회하고 결과에 'assembly'를 넣음
+    """
+    parsed = [parse_snp(snp, assembly) for snp in snps]
+    accessions = {None: accession}
+    for snp in parsed:
+        if snp.get('assembly') and snp['assembly'] not in accessions:
+            accessions[snp['assembly']] = species_for('ncbi', snp['assembly'])
+
+    found = [load_index(accessions[snp.get('assembly')]).find(snp['chrom'], snp['pos']) for snp in parsed]
+    ncbi.warm_functions(gene['gene_id'] for genes in found for gene in genes if 'functions' not in gene)
+
+    results = []
+    for i, (snp, genes) in enumerate(zip(parsed, found)):
+        snp_value = f'{snp["chrom"]}:{snp["pos"]}'
+        rows = [
+            make_row(snp_value, gene['gene_id'], gene['symbol'],
+                     ', '.join(ncbi.get_cached_functions_only(gene)))
+            for gene in genes
+        ] or [make_row(snp_value)]
+        # Function 정보 없음과 NCBI 요청 실패를 구분할 수 있도록 캐시에 없는 유전자는 실패로 표시
+        failed = any('functions' not in gene and not ncbi.is_function_cached(gene['gene_id']) for gene in genes)
+        result = make_result(i, snp['chrom'], snp['pos'], rows, failed)
+        if snp.get('assembly'):
+            result['assembly'] = snp['assembly']
+        results.append(result)
+    return results
+
+
+class AnnotationHandler(BaseHTTPRequestHandler):
+    accession = NCBI_ACCESSION
+
+    def do_GET(self):
+        if self.path != '/health':
+            self.send_json(404, {'error': 'not found'})
+            return
+        index = ncbi.load_gene_index(self.accession)
+        self.send_json(200, {
+            'accession': self.accession,
+            'genes': len(index) if index is not None else 0,
+            'cached_functions': ncbi.cached_function_count(),
+        })
+
+    def do_POST(self):
+        if self.path != '/annotate':
+            self.send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError('요청 본문은 JSON 객체여야 함')
+            snps = body.get('snps')
+            if not isinstance(snps, list):
+                raise ValueError('snps 필드는 리스트여야 함')
+            results = annotate_batch(snps, self.accession, body.get('assembly'))
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            logger.error(f'어노테이션 실패: {e}')
+            self.send_json(500, {'error': str(e)})
+            return
+        self.send_json(200, {'results': results})
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, accession=NCBI_ACCESSION, preload_functions=False):
+    """인덱스를 미리 불러온 뒤 요청을 계속 처리"""
+    index = load_index(accession)
+    if preload_functions:
+        logger.info('전체 유전자 Function 정보 미리 불러오는 중...')
+        ncbi.warm_functions(gene['gene_id'] for gene in index.genes if 'functions' not in gene)
+        logger.info(f'Function 정보 캐시 완료: {ncbi.cached_function_count()}개 유전자')
+
+    handler = type('Handler', (AnnotationHandler,), {'accession': accession})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info(f'어노테이션 서비스 시작: http://{host}:{port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info('어노테이션 서비스 종료')
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='로컬 SNP 어노테이션 서비스')
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    species = parser.add_mutually_exclusive_group()
+    species.add_argument('--species', default=NCBI_ACCESSION, help='기본 NCBI 어셈블리 accession')
+    species.add_argument('--assembly', choices=sorted(get_assemblies()), help='기본 종 / 어셈블리 이름')
+    parser.add_argument('--preload-functions', action='store_true',
+                        help='시작 시 전체 유전자의 Function 정보를 미리 조회')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    accession = species_for('ncbi', args.assembly) if args.assembly else args.species
+    serve(args.host, args.port, accession, args.preload_functions)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,43 @@
+"""SNP 입력 파싱"""
+import json
+
+
+def parse_snp(snp, assembly=None):
+    """"11: 55704515" 문자열 또는 {'chrom', 'pos'[, 'assembly']} 딕셔너리를 파싱
+
+    어셈블리가 지정된 경우에만 결과에 'assembly' 키를 넣음 (SNP의 값이 assembly 인자보다 우선)
+    """
+    if isinstance(snp, dict):
+        chrom_value, position_value = snp['chrom'], snp['pos']
+        assembly = snp.get('assembly') or assembly
+    else:
+        chrom_value, position_value = str(snp).split(':')
+    parsed = {
+        'chrom': str(chrom_value).strip(),
+        'pos': int(str(position_value).strip())  # int로 변환
+    }
+    if assembly:
+        parsed['assembly'] = assembly
+    return parsed
+
+
+def load_positions_from_json(file_path):
+    """snps.json 파일에서 위치 정보를 읽어옴
+
+    여러 종 / 어셈블리를 한 파일에 넣을 때는 최상위 "assembly" 또는
+    "panels": [{"assembly": "pig", "snps": [...]}, ...] 형식을 사용함
+    """
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+
+    panels = data.get('panels')
+    if panels is None:
+        panels = [data]
+
+    positions = []
+    for panel in panels:
+        snps = panel.get('snps')
+        if snps is None:
+            continue
+        positions.extend(parse_snp(snp, panel.get('assembly') or data.get('assembly')) for snp in snps)
+    return positions
@@ -0,0 +1,85 @@
+"""SNP 단위 어노테이션 결과 저장소 (증분 실행용)"""
+import json
+import logging
+import os
+
+from .config import ANNOTATION_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+def make_version(source, species):
+    """결과가 유효한 조건: 소스, 종/어셈블리, 어노테이션 로직 버전"""
+    return f'{source}/{species}/{ANNOTATION_VERSION}'
+
+
+class ResultStore:
+    """chrom:pos 를 키로 SNP별 결과 행을 저장하는 JSON Lines 파일
+
+    첫 줄은 {"version": ...} 헤더, 이후 한 줄에 SNP 하나씩 추가만 하므로
+    저장 비용이 새로 조회한 결과 수에만 비례함. 같은 SNP가 여러 번 있으면
+    마지막 줄이 우선이며, 버전이 다른 파일은 재사용하지 않으므로 어셈블리나
+    파싱 로직이 바뀌면 모든 SNP를 다시 조회함
+    """
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.results = {}
+        self._pending = []
+        self._write_header = True
+
+    @classmethod
+    def load(cls, path, version):
+        store = cls(path, version)
+        if not os.path.exists(path):
+            return store
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('version') != version:
+                    logger.info(f'결과 저장소 버전 변경 ({header.get("version")} -> {version}), '
+                                f'모든 SNP를 다시 조회합니다.')
+                    return store
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 저장 중 중단되어 마지막 줄이 잘린 경우
+                        continue
+                    store.results[entry['snp']] = entry['rows']
+        except Exception as e:
+            logger.error(f'결과 저장소 로드 실패: {e}. 새로 시작합니다.')
+            store.results = {}
+            return store
+
+        store._write_header = False
+        logger.info(f'결과 저장소 로드: {len(store.results)}개 SNP ({path})')
+        return store
+
+    def __contains__(self, snp_key):
+        return snp_key in self.results
+
+    def __len__(self):
+        return len(self.results)
+
+    def get(self, snp_key):
+        return self.results.get(snp_key)
+
+    def put(self, snp_key, rows):
+        self.results[snp_key] = rows
+        self._pending.append(snp_key)
+
+    def save(self):
+        """새로 추가된 결과만 파일 끝에 기록 (버전이 바뀐 경우 파일을 새로 작성)"""
+        if not self._pending and not self._write_header:
+            return
+        mode = 'w' if self._write_header else 'a'
+        with open(self.path, mode, encoding='utf-8') as f:
+            if self._write_header:
+                f.write(json.dumps({'version': self.version}) + '\n')
+            for snp_key in self._pending:
+                f.write(json.dumps({'snp': snp_key, 'rows': self.results[snp_key]}, ensure_ascii=False) + '\n')
+        self._write_header = False
+        self._pending = []
+        logger.debug(f'결과 저장소 저장: {len(self.results)}개 SNP ({self.path})')
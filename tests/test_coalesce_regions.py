@@ -0,0 +1,97 @@
+from snp_annotator import ensembl
+from snp_annotator.ensembl import coalesce_regions
+
+
+def snps_at(*positions):
+    return [{'chrom': chrom, 'pos': pos} for chrom, pos in positions]
+
+
+def spans(regions):
+    return [(region['chrom'], region['start'], region['end'], region['members']) for region in regions]
+
+
+def test_gap_limit():
+    snps = snps_at(('1', 100), ('1', 600), ('1', 1101))
+    assert spans(coalesce_regions(snps, max_gap=500, max_size=10_000)) == [
+        ('1', 100, 600, [0, 1]),
+        ('1', 1101, 1101, [2]),
+    ]
+
+
+def test_size_limit():
+    # 구간 길이는 양 끝 포함: 100..1099 는 1000
+    snps = snps_at(('1', 100), ('1', 600), ('1', 1099), ('1', 1100))
+    assert spans(coalesce_regions(snps, max_gap=500, max_size=1000)) == [
+        ('1', 100, 1099, [0, 1, 2]),
+        ('1', 1100, 1100, [3]),
+    ]
+
+
+def test_chromosome_change_starts_new_region():
+    snps = snps_at(('1', 100), ('2', 110), ('1', 120))
+    assert spans(coalesce_regions(snps, max_gap=500, max_size=10_000)) == [
+        ('1', 100, 120, [0, 2]),
+        ('2', 110, 110, [1]),
+    ]
+
+
+def test_unsorted_input_and_duplicates():
+    snps = snps_at(('1', 5000), ('1', 100), ('1', 5000), ('1', 300))
+    regions = coalesce_regions(snps, max_gap=500, max_size=10_000)
+    assert spans(regions) == [
+        ('1', 100, 300, [1, 3]),
+        ('1', 5000, 5000, [0, 2]),
+    ]
+    assert sorted(i for region in regions for i in region['members']) == list(range(len(snps)))
+
+
+def test_iter_snp_genes_one_request_per_region(monkeypatch):
+    requests = []
+
+    def get_genes_in_region(species, chrom, start, end):
+        requests.append((chrom, start, end))
+        if chrom == '9':
+            return None
+        return [{'id': 'G1', 'start': 50, 'end': 250}, {'id': 'G2', 'start': 200, 'end': 20_000_000}]
+
+    monkeypatch.setattr(ensembl, 'get_genes_in_region', get_genes_in_region)
+    snps = ['1: 300', '1: 100', '9: 5', '1: 200', '1: 10000000']
+
+    found = [(i, snp['pos'], None if genes is None else [gene['id'] for gene in genes])
+             for i, snp, genes in ensembl.iter_snp_genes(snps, 'bos_taurus')]
+
+    assert found == [
+        (0, 300, ['G2']),
+        (1, 100, ['G1']),
+        (2, 5, None),
+        (3, 200, ['G1', 'G2']),
+        (4, 10_000_000, ['G2']),
+    ]
+    assert sorted(requests) == [('1', 100, 300), ('1', 10_000_000, 10_000_000), ('9', 5, 5)]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+def test_region_request_is_retried(monkeypatch):
+    from snp_annotator import net
+
+    responses = [FakeResponse(500), FakeResponse(429), FakeResponse(200, [{'id': 'G1', 'start': 1, 'end': 10}])]
+    urls = []
+
+    class FakeSession:
+        def get(self, url, **kwargs):
+            urls.append(url)
+            return responses.pop(0)
+
+    monkeypatch.setattr(net, 'get_session', lambda: FakeSession())
+    monkeypatch.setattr(net.time, 'sleep', lambda seconds: None)
+
+    assert ensembl.get_genes_in_region('bos_taurus', '1', 1, 5) == [{'id': 'G1', 'start': 1, 'end': 10}]
+    assert urls == [f'{ensembl.ENSEMBL_REST_URL}/overlap/region/bos_taurus/1:1-5'] * 3
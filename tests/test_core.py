@@ -0,0 +1,56 @@
+import pytest
+
+from snp_annotator import core
+from snp_annotator.results import make_result, make_row
+
+
+@pytest.fixture
+def pulled(monkeypatch):
+    """species별 생성기에서 꺼낸 SNP 기록 (어노테이션 대신 species를 gene 값으로 돌려줌)"""
+    pulled = []
+
+    def annotate(snps, source, species, workers, parse_workers):
+        for i, snp in enumerate(snps):
+            pulled.append((species, snp['pos']))
+            snp_value = f'{snp["chrom"]}:{snp["pos"]}'
+            yield make_result(i, snp['chrom'], snp['pos'], [make_row(snp_value, gene_symbol=species)])
+
+    monkeypatch.setattr(core, '_annotate', annotate)
+    return pulled
+
+
+def interleaved(n):
+    return [{'chrom': '1', 'pos': i, 'assembly': 'cattle' if i % 2 == 0 else 'pig'} for i in range(n)]
+
+
+def test_interleaved_assemblies_stream_in_input_order(pulled):
+    snps = interleaved(1000)
+    for result in core.annotate(snps, source='ncbi'):
+        i = result['index']
+        assert result['pos'] == i
+        assert result['assembly'] == snps[i]['assembly']
+        assert result['rows'][0]['assembly'] == snps[i]['assembly']
+        assert result['rows'][0]['gene'] == core.resolve_species('ncbi', assembly=snps[i]['assembly'])
+        # 앞선 결과를 기다리며 보관하지 않음: 지금까지 꺼낸 SNP는 생성한 결과뿐
+        assert len(pulled) == i + 1
+    assert len(pulled) == 1000
+
+
+def test_start_offset(pulled):
+    snps = interleaved(10)
+    indices = [result['index'] for result in core.annotate(snps, source='ncbi', start=7)]
+    assert indices == [7, 8, 9]
+    assert [pos for _, pos in pulled] == [7, 8, 9]
+
+
+def test_default_assembly_shares_species_group(pulled):
+    snps = [{'chrom': '1', 'pos': 0}, {'chrom': '1', 'pos': 1, 'assembly': 'cattle'}, {'chrom': '1', 'pos': 2}]
+    results = list(core.annotate(snps, source='ncbi'))
+    assert [result.get('assembly') for result in results] == [None, 'cattle', None]
+    assert {species for species, _ in pulled} == {core.resolve_species('ncbi')}
+
+
+def test_unknown_assembly_fails_before_annotating(pulled):
+    with pytest.raises(ValueError):
+        core.annotate([{'chrom': '1', 'pos': 1, 'assembly': 'cow'}], source='ncbi')
+    assert pulled == []
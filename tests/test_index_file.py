@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from snp_annotator.index import GeneIndex, build_gene_index
+from snp_annotator.index_file import MappedGeneIndex, open_index_file, write_index_file
+
+
+def make_index(seed=0, n_genes=300):
+    rng = random.Random(seed)
+    index = GeneIndex()
+    for gene_idx in range(n_genes):
+        chrom = rng.choice(['1', '2', 'X', 'MT'])
+        ranges = []
+        for _ in range(rng.randint(1, 3)):
+            begin = rng.randint(1, 200_000)
+            ranges.append((begin, begin + rng.randint(0, 20_000)))
+        index.add_gene(str(100000 + gene_idx), f'GENE{gene_idx}', [chrom], ranges)
+    return index.build()
+
+
+def probe_positions(index):
+    positions = []
+    for chrom, intervals, _ in index.iter_chromosomes():
+        for begin, end, _ in intervals:
+            positions.extend((chrom, pos) for pos in (begin - 1, begin, end, end + 1))
+    return positions
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / 'test.gidx')
+
+
+def test_round_trip_matches_gene_index(index_path):
+    index = make_index()
+    write_index_file(index_path, index, metadata={'accession': 'GCF_TEST'})
+
+    mapped = MappedGeneIndex(index_path)
+    try:
+        assert len(mapped) == len(index)
+        assert sorted(mapped.chromosomes()) == sorted(index.chromosomes())
+        assert mapped.metadata == {'accession': 'GCF_TEST'}
+        for chrom, pos in probe_positions(index) + [('Y', 100), ('1', 0)]:
+            assert mapped.find(chrom, pos) == index.find(chrom, pos), (chrom, pos)
+    finally:
+        mapped.close()
+
+
+def test_functions_and_ensembl_ids_are_stored(index_path):
+    index = GeneIndex()
+    index.add_gene('527492', 'CTNNA2', ['11'], [(100, 200)], ensembl_gene_ids=['ENSBTAG00000001'])
+    index.add_gene('2', '유전자', ['11'], [(150, 300)])
+    index.add_gene('3', 'EMPTY', ['11'], [(150, 160)])
+    index.build()
+    write_index_file(index_path, index, functions={'527492': ['actin binding', 'protein binding'], '3': []},
+                     metadata={'accession': 'A'})
+
+    mapped = open_index_file(index_path, 'A')
+    try:
+        assert mapped.find('11', 155) == [
+            {'gene_id': '527492', 'symbol': 'CTNNA2', 'functions': ['actin binding', 'protein binding'],
+             'ensembl_gene_ids': ['ENSBTAG00000001']},
+            {'gene_id': '3', 'symbol': 'EMPTY', 'functions': []},
+            {'gene_id': '2', 'symbol': '유전자'},
+        ]
+    finally:
+        mapped.close()
+
+
+def test_build_gene_index_from_reports(index_path):
+    reports = [{'annotation': {
+        'gene_id': '10', 'symbol': 'A', 'chromosomes': ['1'],
+        'genomic_regions': [{'gene_range': {'range': [{'begin': '5', 'end': '50'}, {'begin': '80', 'end': '90'}]}}],
+    }}]
+    index = build_gene_index(reports)
+    write_index_file(index_path, index, metadata={'accession': 'A'})
+
+    mapped = open_index_file(index_path, 'A')
+    try:
+        for pos, expected in ((4, []), (5, ['10']), (60, []), (90, ['10']), (91, [])):
+            assert [gene['gene_id'] for gene in mapped.find('1', pos)] == expected
+    finally:
+        mapped.close()
+
+
+def test_other_accession_is_not_reused(index_path):
+    write_index_file(index_path, make_index(n_genes=10), metadata={'accession': 'A'})
+    assert open_index_file(index_path, 'B') is None
+
+
+@pytest.mark.parametrize('keep', [0.5, 0.9, -1])
+def test_truncated_file_is_rejected(index_path, keep):
+    write_index_file(index_path, make_index(), metadata={'accession': 'A'})
+    with open(index_path, 'rb') as f:
+        data = f.read()
+    with open(index_path, 'wb') as f:
+        f.write(data[:int(len(data) * keep)] if keep > 0 else data[:keep])
+
+    with pytest.raises(ValueError):
+        MappedGeneIndex(index_path)
+    assert open_index_file(index_path, 'A') is None
+
+
+def test_concurrent_writers_do_not_share_temp_file(index_path):
+    import os
+    import threading
+
+    indexes = [make_index(seed) for seed in range(4)]
+    threads = [threading.Thread(target=write_index_file, args=(index_path, index, None, {'accession': 'A'}))
+               for index in indexes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert os.listdir(os.path.dirname(index_path)) == [os.path.basename(index_path)]
+    mapped = open_index_file(index_path, 'A')
+    try:
+        # 어느 쓰기가 마지막이든 파일은 그중 하나의 완전한 인덱스
+        assert any(all(mapped.find(chrom, pos) == index.find(chrom, pos) for chrom, pos in probe_positions(index))
+                   for index in indexes)
+    finally:
+        mapped.close()
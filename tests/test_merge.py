@@ -0,0 +1,51 @@
+from snp_annotator.merge import merge_rows, parse_species
+from snp_annotator.results import make_row
+
+
+def ensembl_row(gene_id, symbol, function='', ncbi_gene_id=None):
+    return make_row('1:100', gene_id, symbol, function, ncbi_gene_id=ncbi_gene_id)
+
+
+def ncbi_row(gene_id, symbol, function='', ensembl_gene_ids=()):
+    return make_row('1:100', gene_id, symbol, function, ensembl_gene_ids=list(ensembl_gene_ids))
+
+
+def joined(rows):
+    return [(row['ensembl_gene_id'], row['ncbi_gene_id'], row['gene']) for row in rows]
+
+
+def test_join_on_ncbi_gene_id():
+    rows = merge_rows('1:100', [ensembl_row('ENSBTAG1', 'CTNNA2', 'e', ncbi_gene_id='527492')],
+                      [ncbi_row('527492', 'CTNNA2', 'n')])
+    assert joined(rows) == [('ENSBTAG1', '527492', 'CTNNA2')]
+    assert (rows[0]['ensembl_function'], rows[0]['ncbi_function']) == ('e', 'n')
+
+
+def test_join_on_ensembl_gene_ids():
+    ncbi_rows = [ncbi_row('1', 'A', ensembl_gene_ids=['ENSBTAG9']), ncbi_row('2', 'B', ensembl_gene_ids=['ENSBTAG1'])]
+    rows = merge_rows('1:100', [ensembl_row('ENSBTAG1', 'X')], ncbi_rows)
+    assert joined(rows) == [('ENSBTAG1', '2', 'B'), ('', '1', 'A')]
+
+
+def test_unmatched_genes_keep_their_own_rows():
+    rows = merge_rows('1:100', [ensembl_row('ENSBTAG1', '-', ncbi_gene_id='9')], [ncbi_row('2', 'B')])
+    assert joined(rows) == [('ENSBTAG1', '9', ''), ('', '2', 'B')]
+
+
+def test_ncbi_gene_matches_only_once():
+    ensembl_rows = [ensembl_row('ENSBTAG1', 'A', ncbi_gene_id='1'), ensembl_row('ENSBTAG2', 'A2', ncbi_gene_id='1')]
+    rows = merge_rows('1:100', ensembl_rows, [ncbi_row('1', 'A')])
+    assert joined(rows) == [('ENSBTAG1', '1', 'A'), ('ENSBTAG2', '1', 'A2')]
+    assert rows[1]['ncbi_function'] == ''
+
+
+def test_no_genes_gives_one_empty_row():
+    rows = merge_rows('1:100', [make_row('1:100')], [make_row('1:100')])
+    assert joined(rows) == [('', '', '')]
+    assert rows[0]['snp'] == '1:100'
+
+
+def test_parse_species():
+    assert parse_species('sus_scrofa,GCF_000003025.6') == ('sus_scrofa', 'GCF_000003025.6')
+    assert parse_species(('gallus_gallus', 'GCF_016699485.2')) == ('gallus_gallus', 'GCF_016699485.2')
+    assert parse_species(',GCF_X') == ('bos_taurus', 'GCF_X')
@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+
+from snp_annotator import ncbi, pipeline
+from snp_annotator.index import GeneIndex
+
+
+@pytest.fixture
+def gene_index(monkeypatch):
+    """1번 염색체에 1000bp 간격으로 유전자 300개 (SNP마다 유전자 하나)"""
+    index = GeneIndex()
+    for gene_idx in range(300):
+        begin = gene_idx * 1000 + 1
+        index.add_gene(str(gene_idx), f'G{gene_idx}', ['1'], [(begin, begin + 499)])
+    index.build()
+    monkeypatch.setattr(ncbi, 'load_gene_index', lambda accession: index)
+    monkeypatch.setattr(ncbi, '_function_cache', {})
+    return index
+
+
+def test_gene_functions_are_fetched_in_batches(monkeypatch, gene_index):
+    requests = []
+    lock = threading.Lock()
+
+    def fetch_functions(gene_ids):
+        with lock:
+            requests.append(list(gene_ids))
+        return {gene_id: [f'function {gene_id}'] for gene_id in gene_ids}
+
+    monkeypatch.setattr(ncbi, 'fetch_functions', fetch_functions)
+    snps = [f'1: {gene_idx * 1000 + 10}' for gene_idx in range(300)] + ['1: 10']
+
+    results = list(pipeline.annotate(snps, 'ncbi', 'GCF_TEST', io_workers=4, window=64))
+
+    assert [result['index'] for result in results] == list(range(301))
+    assert all(not result['failed'] for result in results)
+    assert results[5]['rows'][0]['function'] == 'function 5'
+    assert results[300]['rows'][0]['function'] == 'function 0'
+    # 유전자마다 한 번씩, window 단위로 묶어서 요청
+    assert sorted(gene_id for batch in requests for gene_id in batch) == sorted(str(i) for i in range(300))
+    assert len(requests) <= 300 // 64 + 1
+
+
+def test_failed_batch_marks_snps_failed(monkeypatch, gene_index):
+    monkeypatch.setattr(ncbi, 'fetch_functions', lambda gene_ids: None)
+
+    results = list(pipeline.annotate(['1: 10', '1: 1010'], 'ncbi', 'GCF_TEST', io_workers=2))
+
+    assert [result['failed'] for result in results] == [True, True]
+    assert [result['rows'][0]['function'] for result in results] == ['', '']
+    assert not ncbi.is_function_cached('0')
@@ -0,0 +1,84 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from snp_annotator import ncbi, service
+from snp_annotator.index import GeneIndex
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """유전자 두 개짜리 인덱스, gene/id 요청은 기록만 하고 성공으로 응답"""
+    index = GeneIndex()
+    index.add_gene('1', 'A', ['1'], [(1, 100)])
+    index.add_gene('2', 'B', ['1'], [(50, 200)])
+    index.build()
+    monkeypatch.setattr(ncbi, 'load_gene_index', lambda accession: index)
+    monkeypatch.setattr(ncbi, '_function_cache', {})
+
+    fetched = []
+
+    def fetch_functions(gene_ids):
+        gene_ids = list(gene_ids)
+        fetched.append(gene_ids)
+        return {gene_id: [f'function {gene_id}'] for gene_id in gene_ids}
+
+    monkeypatch.setattr(ncbi, 'fetch_functions', fetch_functions)
+    return fetched
+
+
+@pytest.fixture
+def server_url(fetched):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), service.AnnotationHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def post(url, body):
+    request = urllib.request.Request(f'{url}/annotate', data=json.dumps(body).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    'snps',
+    {'snps': '1: 10'},
+    {'snps': ['1: 10'], 'assembly': 'cow'},
+    {'snps': [{'chrom': '1', 'pos': 10, 'assembly': 'cow'}]},
+])
+def test_bad_request_returns_400(server_url, body):
+    status, payload = post(server_url, body)
+    assert status == 400
+    assert 'error' in payload
+
+
+def test_annotate_request(server_url, fetched):
+    status, payload = post(server_url, {'snps': ['1: 60', {'chrom': '1', 'pos': 150}, '2: 5']})
+    assert status == 200
+    results = payload['results']
+    assert [[row['gene'] for row in result['rows']] for result in results] == [['A', 'B'], ['B'], ['']]
+    assert results[0]['rows'][1]['function'] == 'function 2'
+    assert not any(result['failed'] for result in results)
+    assert fetched == [['1', '2']]
+
+
+def test_failed_function_request_marks_snp_failed(monkeypatch, fetched):
+    monkeypatch.setattr(ncbi, 'fetch_functions', lambda gene_ids: None)
+    results = service.annotate_batch(['1: 150', '2: 5'])
+    assert [result['failed'] for result in results] == [True, False]
+    assert results[0]['rows'][0]['function'] == ''
+    assert not ncbi.is_function_cached('2')
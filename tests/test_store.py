@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from snp_annotator import core
+from snp_annotator.results import make_result, make_row
+from snp_annotator.store import ResultStore
+
+
+@pytest.fixture
+def looked_up(monkeypatch):
+    """실제로 조회한 SNP 기록 (pos가 음수인 SNP는 조회 실패로 돌려줌)"""
+    looked_up = []
+
+    def annotate(snps, source, species, workers, parse_workers):
+        for i, snp in enumerate(snps):
+            looked_up.append(f'{snp["chrom"]}:{snp["pos"]}')
+            snp_value = f'{snp["chrom"]}:{snp["pos"]}'
+            failed = snp['pos'] < 0
+            rows = [make_row(snp_value)] if failed else [make_row(snp_value, gene_symbol=f'G{snp["pos"]}')]
+            yield make_result(i, snp['chrom'], snp['pos'], rows, failed=failed)
+
+    monkeypatch.setattr(core, '_annotate', annotate)
+    return looked_up
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'results.jsonl')
+
+
+def snps_at(*positions):
+    return [{'chrom': '1', 'pos': pos} for pos in positions]
+
+
+def run(snps, store):
+    results = list(core.annotate_incremental(snps, store))
+    store.save()
+    return results
+
+
+def test_reordered_input_needs_no_new_lookups(looked_up, store_path):
+    run(snps_at(1, 2, 3), ResultStore.load(store_path, 'v1'))
+    looked_up.clear()
+
+    store = ResultStore.load(store_path, 'v1')
+    assert run(snps_at(3, 1, 2), store) == []
+    assert looked_up == []
+    assert len(store) == 3
+
+
+def test_duplicate_key_is_looked_up_once(looked_up, store_path):
+    store = ResultStore.load(store_path, 'v1')
+    results = run(snps_at(5, 7, 5, 5), store)
+    assert looked_up == ['1:5', '1:7']
+    assert [result['snp'] for result in results] == ['1:5', '1:7']
+
+
+def test_failed_results_are_not_stored(looked_up, store_path):
+    run(snps_at(1, -1), ResultStore.load(store_path, 'v1'))
+
+    store = ResultStore.load(store_path, 'v1')
+    assert '1:1' in store and '1:-1' not in store
+    looked_up.clear()
+    run(snps_at(1, -1), store)
+    assert looked_up == ['1:-1']
+
+
+def test_version_mismatch_rewrites_file(looked_up, store_path):
+    run(snps_at(1, 2), ResultStore.load(store_path, 'v1'))
+    looked_up.clear()
+
+    store = ResultStore.load(store_path, 'v2')
+    assert len(store) == 0
+    run(snps_at(2), store)
+    assert looked_up == ['1:2']
+
+    with open(store_path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines == [{'version': 'v2'}, {'snp': '1:2', 'rows': [make_row('1:2', gene_symbol='G2')]}]
+
+
+def test_truncated_last_line_is_skipped(looked_up, store_path):
+    run(snps_at(1, 2), ResultStore.load(store_path, 'v1'))
+    with open(store_path, encoding='utf-8') as f:
+        data = f.read()
+    with open(store_path, 'w', encoding='utf-8') as f:
+        f.write(data[:-10])
+
+    store = ResultStore.load(store_path, 'v1')
+    assert '1:1' in store and '1:2' not in store
+
+
+def test_rows_from_store_follow_input_order(looked_up, store_path):
+    store = ResultStore.load(store_path, 'v1')
+    run(snps_at(2, 1), store)
+
+    rows = list(core.rows_from_store(snps_at(1, 9, 2, 1), store))
+    assert [(row['snp'], row['gene']) for row in rows] == [('1:1', 'G1'), ('1:9', ''), ('1:2', 'G2'), ('1:1', 'G1')]